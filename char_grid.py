@@ -0,0 +1,166 @@
+"""
+字符网格 - Char Grid
+ASCII字符画共用的字符缓冲区：整个画面保存在一块 (高, 宽+1) 的 NumPy uint32 数组中，每格存一个Unicode码位，
+每行末尾固定一列换行符，整块缓冲区按UCS4解释就是完整的显示字符串，转换时不需要逐格创建字符串对象再逐行拼接
+Sprite 是预先光栅化、带透明掩码的字符块，通过 CharGrid.draw 以切片复制画到网格上
+可选的属性层为每格保存一个小整数（如颜色标签编号），attribute_runs() 把同一行中相邻的同属性格子合并成区段，
+便于一次性交给 Tk 的 tag_add
+gemini/丑陋字符画.py 和 deepseek/好看的字符画.py 共用（两个脚本启动时把仓库根目录加入 sys.path）
+"""
+
+import numpy as np
+
+NEWLINE = ord('\n')
+
+
+def encode(chars):
+    """把字符串（或字符列表）转换为码位数组，可以直接用于 fill / scatter / blit"""
+    return np.array([ord(ch) for ch in chars], dtype=np.uint32)
+
+
+class CharGrid:
+    """
+    width × height 的字符网格
+    cells 是不含换行列的 (height, width) 视图，可以直接用NumPy切片读写；row(r) 是单行视图
+    attributes 为 True 时另有同样大小的 uint8 属性层 attrs（0 表示无属性），写入方法的 attr 参数同时写入属性
+    所有写入方法都会裁掉超出网格的部分
+    """
+
+    def __init__(self, width, height, fill=' ', attributes=False):
+        self.width = width
+        self.height = height
+        self.buffer = np.empty((height, width + 1), dtype=np.uint32)
+        self.buffer[:, width] = NEWLINE
+        self.cells = self.buffer[:, :width]
+        self.cells[:] = ord(fill)
+        # 整个画面（去掉最后一个换行符）按UCS4解释成一个字符串的dtype
+        self._text_dtype = np.dtype(f'<U{max(height * (width + 1) - 1, 1)}')
+        # 属性层同样多留一列并固定为0，按行展平后区段不会跨行
+        self.attr_buffer = np.zeros((height, width + 1), dtype=np.uint8) if attributes else None
+        self.attrs = self.attr_buffer[:, :width] if attributes else None
+
+    def row(self, r):
+        """第 r 行的视图"""
+        return self.cells[r]
+
+    def fill(self, char=' ', rows=slice(None), cols=slice(None), attr=0):
+        """把一块区域（默认整个网格）填成同一个字符，有属性层时属性一并设为 attr"""
+        self.cells[rows, cols] = ord(char)
+        if self.attrs is not None:
+            self.attrs[rows, cols] = attr
+
+    def scatter(self, rows, cols, codes, attr=None):
+        """
+        批量写入离散的格子：rows/cols 为坐标数组（浮点坐标与 int() 一样向零取整），codes 为单个码位或等长的码位数组
+        同一格子写入多次时以最后一次为准，返回实际写入（在网格内）的格子数
+        """
+        rows = np.asarray(rows).astype(np.int64)
+        cols = np.asarray(cols).astype(np.int64)
+        inside = (rows >= 0) & (rows < self.height) & (cols >= 0) & (cols < self.width)
+        codes = np.asarray(codes, dtype=np.uint32)
+        if codes.ndim:
+            codes = codes[inside]
+        rows, cols = rows[inside], cols[inside]
+        self.cells[rows, cols] = codes
+        if attr is not None:
+            self.attrs[rows, cols] = attr
+        return len(rows)
+
+    def blit(self, top, left, source, transparent=None, attr=None, mask=None):
+        """
+        把一块字符（二维码位数组、CharGrid 或字符串列表）贴到 (top, left)
+        transparent 为透明字符，源中等于该字符的格子不覆盖网格原有内容；
+        mask 为与源同形状的布尔数组，只复制其中为 True 的格子
+        """
+        if isinstance(source, CharGrid):
+            source = source.cells
+        elif not isinstance(source, np.ndarray):
+            source = np.array([[ord(ch) for ch in line] for line in source], dtype=np.uint32)
+        height, width = source.shape
+        r0, c0 = max(top, 0), max(left, 0)
+        r1, c1 = min(top + height, self.height), min(left + width, self.width)
+        if r0 >= r1 or c0 >= c1:
+            return
+        window = (slice(r0 - top, r1 - top), slice(c0 - left, c1 - left))
+        source = source[window]
+        if mask is not None:
+            mask = mask[window]
+        if transparent is not None:
+            opaque = source != ord(transparent)
+            mask = opaque if mask is None else mask & opaque
+        # 整块切片复制，透明格子由 where 跳过
+        target = self.cells[r0:r1, c0:c1]
+        np.copyto(target, source, where=True if mask is None else mask)
+        if attr is not None:
+            np.copyto(self.attrs[r0:r1, c0:c1], attr, where=True if mask is None else mask)
+
+    def draw(self, sprite, row, col, attr=None):
+        """把精灵画到锚点 (row, col)，精灵左上角位于锚点加 sprite.origin"""
+        self.blit(row + sprite.origin[0], col + sprite.origin[1], sprite.codes, attr=attr, mask=sprite.mask)
+
+    def attribute_runs(self):
+        """
+        把属性层中同一行相邻、属性相同且非0的格子合并成区段
+        返回 (属性, 行, 起始列, 结束列) 四个等长数组，结束列不包含在区段内
+        """
+        flat = self.attr_buffer.reshape(-1)
+        starts = np.concatenate(([0], np.flatnonzero(flat[1:] != flat[:-1]) + 1))
+        stops = np.append(starts[1:], len(flat))
+        values = flat[starts]
+        keep = values != 0
+        starts, stops, values = starts[keep], stops[keep], values[keep]
+        rows = starts // (self.width + 1)
+        offset = rows * (self.width + 1)
+        return values, rows, starts - offset, stops - offset
+
+    def text(self, r, start=0, stop=None):
+        """第 r 行 [start, stop) 列的字符串"""
+        stop = self.width if stop is None else stop
+        if stop <= start:
+            return ''
+        return str(self.cells[r, start:stop].view(f'<U{stop - start}')[0])
+
+    def to_string(self):
+        """整个画面的显示字符串（行之间用换行符分隔），直接由缓冲区解释得到"""
+        return str(self.buffer.reshape(-1)[:-1].view(self._text_dtype)[0])
+
+    def __str__(self):
+        return self.to_string()
+
+
+class Sprite:
+    """
+    预先光栅化的字符块：codes 为 (h, w) 码位数组，mask 为不透明格子的布尔数组，
+    origin 为左上角相对锚点的偏移 (行, 列)；用 CharGrid.draw 画到网格上
+    """
+
+    def __init__(self, codes, mask=None, origin=(0, 0)):
+        self.codes = np.ascontiguousarray(codes, dtype=np.uint32)
+        self.mask = np.ones(self.codes.shape, dtype=bool) if mask is None else np.asarray(mask, dtype=bool)
+        self.origin = origin
+
+    @classmethod
+    def from_lines(cls, lines, transparent=' ', origin=(0, 0)):
+        """由字符串列表创建，transparent 字符（默认空格）为透明格子"""
+        width = max(len(line) for line in lines)
+        codes = np.array([[ord(ch) for ch in line.ljust(width)] for line in lines], dtype=np.uint32)
+        mask = None if transparent is None else codes != ord(transparent)
+        return cls(codes, mask, origin)
+
+    @classmethod
+    def from_cells(cls, rows, cols, codes):
+        """
+        由相对锚点的整数格子坐标和码位光栅化，未写到的格子透明
+        同一格子写入多次时以最后一次为准，与 CharGrid.scatter 一致
+        """
+        rows = np.asarray(rows, dtype=np.int64)
+        cols = np.asarray(cols, dtype=np.int64)
+        if len(rows) == 0:
+            return cls(np.zeros((0, 0)), origin=(0, 0))
+        top, left = int(rows.min()), int(cols.min())
+        shape = (int(rows.max()) - top + 1, int(cols.max()) - left + 1)
+        sprite = np.full(shape, ord(' '), dtype=np.uint32)
+        mask = np.zeros(shape, dtype=bool)
+        sprite[rows - top, cols - left] = codes
+        mask[rows - top, cols - left] = True
+        return cls(sprite, mask, (top, left))
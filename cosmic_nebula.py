@@ -0,0 +1,149 @@
+"""
+星云生成与烘焙 - Cosmic Nebula
+按 (位置, 大小, 颜色, 种子) 生成星云粒子，并把整团星云预先烘焙成少量带透明度的纹理切片，
+切片沿三个坐标轴各排一组，叠在一起近似体积效果（体积替身 / impostor）
+烘焙结果以PNG纹理和npz元数据缓存到磁盘，再次启动时直接读取
+纯NumPy实现，不依赖vpython
+"""
+
+import hashlib
+import os
+import struct
+import zlib
+import numpy as np
+
+NEBULA_POINTS = 1000  # 每团星云的粒子数
+IMPOSTOR_SLICES = 4  # 每个坐标轴方向的切片数
+IMPOSTOR_RESOLUTION = 64  # 切片纹理的边长（像素）
+IMPOSTOR_VERSION = 1  # 烘焙算法版本，修改算法后递增以使旧缓存失效
+
+
+def generate_nebula_particles(pos, size, color, seed, num_points=NEBULA_POINTS):
+    """在球内随机生成星云粒子，返回位置、颜色、不透明度和半径数组"""
+    rng = np.random.default_rng(seed)
+    theta = rng.uniform(0, np.pi, num_points)
+    phi = rng.uniform(0, 2 * np.pi, num_points)
+    r = rng.uniform(0, size, num_points)
+
+    positions = np.asarray(pos, dtype=float) + r[:, np.newaxis] * np.column_stack((
+        np.sin(theta) * np.cos(phi),
+        np.sin(theta) * np.sin(phi),
+        np.cos(theta)))
+    opacity = rng.uniform(0.1, 0.9, num_points)
+    colors = np.asarray(color, dtype=float) * opacity[:, np.newaxis]
+    radii = size / 30 * rng.uniform(0.1, 0.3, num_points)
+
+    return {
+        'positions': positions,
+        'colors': colors,
+        'opacity': opacity,
+        'radii': radii
+    }
+
+
+def _gaussian_matrix(resolution, sigma):
+    """一维高斯模糊矩阵，img @ K 即沿该轴做卷积"""
+    x = np.arange(resolution)
+    kernel = np.exp(-0.5 * ((x[:, np.newaxis] - x[np.newaxis, :]) / max(sigma, 1e-6)) ** 2)
+    return kernel / kernel.sum(axis=0, keepdims=True)
+
+
+def bake_nebula_impostor(particles, pos, size, slices=IMPOSTOR_SLICES, resolution=IMPOSTOR_RESOLUTION):
+    """
+    把星云粒子烘焙成 3 * slices 张RGBA切片
+    每张切片收集对应厚度内的粒子，投影到切片平面上累加后做高斯模糊
+    返回 (images, centers, normals)：images 为 (K, res, res, 4) 的 uint8 数组，
+    centers 为切片中心，normals 为切片法线所在坐标轴 (0/1/2)
+    """
+    pos = np.asarray(pos, dtype=float)
+    low = pos - size
+    extent = 2.0 * size
+    local = (particles['positions'] - low) / extent  # 归一化到 [0,1]
+    weight = particles['opacity']
+    premultiplied = particles['colors'] * weight[:, np.newaxis]
+    blur = _gaussian_matrix(resolution, np.mean(particles['radii']) / extent * resolution * 2)
+
+    images, centers, normals = [], [], []
+    for axis in range(3):
+        u_axis, v_axis = [a for a in range(3) if a != axis]
+        layer = np.minimum((local[:, axis] * slices).astype(int), slices - 1)
+        u = np.clip((local[:, u_axis] * resolution).astype(int), 0, resolution - 1)
+        v = np.clip((local[:, v_axis] * resolution).astype(int), 0, resolution - 1)
+
+        for k in range(slices):
+            in_layer = layer == k
+            density = np.zeros((resolution, resolution))
+            rgb = np.zeros((resolution, resolution, 3))
+            np.add.at(density, (v[in_layer], u[in_layer]), weight[in_layer])
+            np.add.at(rgb, (v[in_layer], u[in_layer]), premultiplied[in_layer])
+
+            density = blur.T @ density @ blur
+            rgb = np.stack([blur.T @ rgb[..., c] @ blur for c in range(3)], axis=2)
+
+            # 颜色取加权平均并提亮，透明度随密度指数饱和
+            with np.errstate(invalid='ignore', divide='ignore'):
+                color = np.where(density[..., np.newaxis] > 0, rgb / density[..., np.newaxis], 0.0)
+            color = np.clip(color / max(color.max(), 1e-6), 0.0, 1.0)
+            alpha = 1.0 - np.exp(-density * resolution / slices)
+
+            image = np.concatenate((color, alpha[..., np.newaxis]), axis=2)
+            images.append((image * 255).round().astype(np.uint8))
+
+            center = pos.copy()
+            center[axis] = low[axis] + extent * (k + 0.5) / slices
+            centers.append(center)
+            normals.append(axis)
+
+    return np.array(images), np.array(centers), np.array(normals)
+
+
+def write_png(path, rgba, level=9):
+    """把 (H, W, 4) 或 (H, W, 3) 的 uint8 数组写成PNG文件（不依赖图像库），level 为zlib压缩级别"""
+    height, width, channels = rgba.shape
+    # 每行前加一个字节的过滤类型 0
+    raw = np.concatenate((np.zeros((height, 1), dtype=np.uint8),
+                          rgba.reshape(height, width * channels)), axis=1).tobytes()
+
+    def chunk(tag, data):
+        body = tag + data
+        return struct.pack('>I', len(data)) + body + struct.pack('>I', zlib.crc32(body) & 0xffffffff)
+
+    with open(path, 'wb') as f:
+        f.write(b'\x89PNG\r\n\x1a\n')
+        color_type = 6 if channels == 4 else 2  # RGBA / RGB
+        f.write(chunk(b'IHDR', struct.pack('>IIBBBBB', width, height, 8, color_type, 0, 0, 0)))
+        f.write(chunk(b'IDAT', zlib.compress(raw, level)))
+        f.write(chunk(b'IEND', b''))
+
+
+def nebula_cache_key(pos, size, color, seed):
+    """星云缓存键：由生成参数和烘焙参数共同决定"""
+    params = (tuple(float(x) for x in pos), float(size), tuple(float(x) for x in color), seed,
+              NEBULA_POINTS, IMPOSTOR_SLICES, IMPOSTOR_RESOLUTION, IMPOSTOR_VERSION)
+    return hashlib.sha1(repr(params).encode('utf-8')).hexdigest()[:16]
+
+
+def load_or_bake_nebula(pos, size, color, seed, cache_dir):
+    """
+    读取或烘焙星云替身，返回切片列表，每项为 {'texture', 'center', 'normal'}
+    texture 为相对 cache_dir 所在目录的PNG路径，可直接作为vpython纹理文件名
+    """
+    key = nebula_cache_key(pos, size, color, seed)
+    meta_path = os.path.join(cache_dir, f"nebula_{key}.npz")
+    texture_paths = [os.path.join(cache_dir, f"nebula_{key}_{i}.png") for i in range(3 * IMPOSTOR_SLICES)]
+
+    if os.path.isfile(meta_path) and all(os.path.isfile(p) for p in texture_paths):
+        with np.load(meta_path) as meta:
+            centers, normals = meta['centers'], meta['normals']
+    else:
+        os.makedirs(cache_dir, exist_ok=True)
+        particles = generate_nebula_particles(pos, size, color, seed)
+        images, centers, normals = bake_nebula_impostor(particles, pos, size)
+        for path, image in zip(texture_paths, images):
+            write_png(path, image)
+        np.savez(meta_path, centers=centers, normals=normals)
+
+    return [
+        {'texture': path.replace(os.sep, '/'), 'center': center, 'normal': int(normal)}
+        for path, center, normal in zip(texture_paths, centers, normals)
+    ]
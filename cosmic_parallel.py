@@ -0,0 +1,210 @@
+"""
+宇宙场景并行推进 - Cosmic Parallel
+把日冕粒子、小行星带（匀速圆周模式）和黑洞粒子这些互相独立的子系统按下标范围分给多个工作进程，
+状态数组放在同一块 multiprocessing.shared_memory 中，每帧只通过屏障(Barrier)同步，不做任何序列化
+N体积分、行星、吸积盘圆环和脉冲星仍在主进程中推进，与工作进程同时进行
+纯NumPy实现，不依赖vpython
+
+扩展性测试：python cosmic_parallel.py --workers 1 2 4 8
+"""
+
+import argparse
+import os
+import time
+import multiprocessing as mp
+from multiprocessing import shared_memory
+import numpy as np
+from cosmic_scene import generate_scene
+from cosmic_simulation import (CosmicSimulation, SIMULATION_RATE, advance_corona, advance_orbits,
+                               advance_accretion)
+
+SHARED_ALIGNMENT = 64  # 共享内存中每个数组的起始地址按缓存行对齐，减少进程间的伪共享
+
+
+def _shared_layout(arrays):
+    """计算每个数组在共享内存中的 (偏移, 形状, dtype)，返回布局和总字节数"""
+    layout, offset = {}, 0
+    for name, values in arrays.items():
+        offset = -(-offset // SHARED_ALIGNMENT) * SHARED_ALIGNMENT
+        layout[name] = (offset, values.shape, values.dtype.str)
+        offset += values.nbytes
+    return layout, max(offset, 1)
+
+
+def _shared_views(buffer, layout):
+    """按布局在共享内存上建立数组视图"""
+    return {
+        name: np.ndarray(shape, dtype=np.dtype(dtype), buffer=buffer, offset=offset)
+        for name, (offset, shape, dtype) in layout.items()
+    }
+
+
+def split_range(n, parts):
+    """把 [0, n) 尽量均匀地分成 parts 段"""
+    bounds = np.linspace(0, n, parts + 1).astype(int).tolist()
+    return list(zip(bounds[:-1], bounds[1:]))
+
+
+def _worker(index, shm_name, layout, params, barrier):
+    """工作进程：每帧在两次屏障之间推进分到的粒子范围"""
+    # 工作进程与主进程共用同一个资源跟踪器，共享内存只由主进程 unlink
+    shm = shared_memory.SharedMemory(name=shm_name)
+    arrays = _shared_views(shm.buf, layout)
+    control, recycled = arrays['control'], arrays['recycled']
+    rng = np.random.default_rng(params['seed'])
+    sincos = params['sincos']
+
+    (c_lo, c_hi), (a_lo, a_hi), (b_lo, b_hi) = params['ranges']
+    corona = {name[len('corona.'):]: values[c_lo:c_hi]
+              for name, values in arrays.items() if name.startswith('corona.')}
+    corona_positions = arrays['corona_positions'][c_lo:c_hi]
+    asteroid = [arrays[name][a_lo:a_hi] for name in ('asteroid_positions', 'asteroid_distance', 'asteroid_angle',
+                                                     'asteroid_y_offset', 'asteroid_speed')]
+    black_hole = [arrays[name][b_lo:b_hi] for name in ('bh_positions', 'bh_distance', 'bh_angle',
+                                                       'bh_height', 'bh_speed')]
+
+    while True:
+        barrier.wait()  # 等待主进程发出新的一帧
+        if control[1]:
+            break
+        frames = control[0]
+        recycled[index] += advance_corona(corona, corona_positions, params['star_pos'], params['star_radius'],
+                                          frames, rng, sincos)
+        if params['asteroids']:
+            positions, distance, angle, y_offset, speed = asteroid
+            advance_orbits(positions, params['star_pos'], distance, angle, y_offset, speed, frames, sincos)
+        positions, distance, angle, height, speed = black_hole
+        advance_accretion(positions, params['black_hole_pos'], params['black_hole_radius'],
+                          distance, angle, height, speed, frames, rng, sincos)
+        barrier.wait()  # 本帧完成
+
+
+class ParallelStepper:
+    """
+    为 CosmicSimulation 开启多进程推进：把模拟的粒子数组搬进共享内存并替换为共享视图，
+    之后 sim.step() 自动把粒子子系统交给工作进程；close() 后数组复制回普通内存
+    工作进程使用各自的随机数流，粒子重生的随机结果与单进程模式不同
+    """
+
+    def __init__(self, sim, workers, seed=0):
+        self.sim = sim
+        self.workers = workers
+        arrays = sim.particle_arrays()
+        self.names = list(arrays)
+
+        layout, size = _shared_layout(dict(arrays,
+                                           control=np.zeros(2),  # [本帧的参考帧数, 停止标志]
+                                           recycled=np.zeros(workers, dtype=np.int64)))
+        self.shm = shared_memory.SharedMemory(create=True, size=size)
+        self.arrays = _shared_views(self.shm.buf, layout)
+        for name, values in arrays.items():
+            self.arrays[name][...] = values
+        self.control, self.recycled = self.arrays['control'], self.arrays['recycled']
+        self.control[:] = 0
+        self.recycled[:] = 0
+        sim.bind_particle_arrays({name: self.arrays[name] for name in self.names})
+
+        ctx = mp.get_context()
+        self.barrier = ctx.Barrier(workers + 1)
+        ranges = zip(split_range(len(sim.corona_positions), workers),
+                     split_range(len(sim.asteroid_positions), workers),
+                     split_range(len(sim.bh_positions), workers))
+        seeds = np.random.SeedSequence(seed).spawn(workers)
+        self.processes = []
+        for index, (worker_ranges, worker_seed) in enumerate(zip(ranges, seeds)):
+            params = {
+                'seed': worker_seed,
+                'ranges': worker_ranges,
+                'asteroids': sim.physics is None,  # N体模式下小行星由主进程的积分器推进
+                'star_pos': sim.star_pos,
+                'star_radius': sim.star_radius,
+                'black_hole_pos': sim.black_hole_pos,
+                'black_hole_radius': sim.black_hole_radius,
+                'sincos': sim.sincos
+            }
+            process = ctx.Process(target=_worker, args=(index, self.shm.name, layout, params, self.barrier),
+                                  daemon=True)
+            process.start()
+            self.processes.append(process)
+        sim.parallel = self
+
+    def begin(self, frames):
+        """通知工作进程开始推进一帧"""
+        self.control[0] = frames
+        self.barrier.wait()
+
+    def finish(self):
+        """等待工作进程完成本帧，返回本帧重生的日冕粒子数"""
+        self.barrier.wait()
+        recycled = int(self.recycled.sum())
+        self.recycled[:] = 0
+        return recycled
+
+    def close(self):
+        """停止工作进程，把粒子数组复制回普通内存并释放共享内存"""
+        if self.shm is None:
+            return
+        self.control[1] = 1
+        self.barrier.wait()
+        for process in self.processes:
+            process.join()
+        self.sim.bind_particle_arrays({name: self.arrays[name].copy() for name in self.names})
+        self.sim.parallel = None
+        self.arrays = self.control = self.recycled = None
+        try:
+            self.shm.close()
+        except BufferError:
+            # 外部仍持有共享视图（例如渲染器），映射在这些视图释放后自动解除
+            pass
+        self.shm.unlink()
+        self.shm = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def _time_frames(sim, frames):
+    """推进 frames 帧，返回用时（秒）"""
+    dt = 1.0 / SIMULATION_RATE
+    sim.step(dt)  # 预热
+    start = time.perf_counter()
+    for _ in range(frames):
+        sim.step(dt)
+    return time.perf_counter() - start
+
+
+def benchmark_parallel(worker_counts=(1, 2, 4, 8), frames=200, particle_scale=1000, seed=2024,
+                       physics_mode="kinematic"):
+    """单进程与不同工作进程数的吞吐量对比"""
+    scene_data = generate_scene(seed, particle_scale)
+    print(f"CPU核心数 {os.cpu_count()}, 粒子倍数 {particle_scale}, {frames} 帧, 运动模式 {physics_mode}")
+    print(f"{'进程数':>6} {'用时(秒)':>10} {'帧/秒':>10} {'运动体·步/秒':>16} {'加速比':>8}")
+
+    sim = CosmicSimulation(scene_data, seed, physics_mode)
+    baseline = _time_frames(sim, frames)
+    bodies = sim.body_count
+    print(f"{'串行':>6} {baseline:>10.3f} {frames / baseline:>10.1f} {bodies * frames / baseline:>16,.0f} {1.0:>8.2f}")
+
+    results = {0: baseline}
+    for workers in worker_counts:
+        sim = CosmicSimulation(scene_data, seed, physics_mode)
+        with ParallelStepper(sim, workers, seed):
+            elapsed = _time_frames(sim, frames)
+        results[workers] = elapsed
+        print(f"{workers:>6} {elapsed:>10.3f} {frames / elapsed:>10.1f} {bodies * frames / elapsed:>16,.0f} "
+              f"{baseline / elapsed:>8.2f}")
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="多进程推进的扩展性测试")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8], help="要测试的工作进程数")
+    parser.add_argument("--frames", type=int, default=200, help="每组测试推进的帧数")
+    parser.add_argument("--scale", type=int, default=1000, help="粒子数量相对默认场景的倍数")
+    parser.add_argument("--seed", type=int, default=2024, help="场景随机种子")
+    parser.add_argument("--physics", choices=("nbody", "kinematic"), default="kinematic", help="运动模式")
+    args = parser.parse_args()
+    benchmark_parallel(args.workers, args.frames, args.scale, args.seed, args.physics)
@@ -0,0 +1,396 @@
+"""
+宇宙场景物理模块 - Cosmic Physics
+纯NumPy实现的N体引力积分器，不依赖vpython，可在无界面的服务器上批量模拟
+长度单位与场景一致（米 / SCALE_FACTOR），时间单位为秒
+"""
+
+import argparse
+import math
+import time
+import numpy as np
+
+# 全局常量
+SCALE_FACTOR = 1e9  # 比例因子，用于缩放真实天体距离
+G = 6.67430e-11  # 万有引力常数
+AU = 149.6e9  # 天文单位(m)
+SUN_MASS = 1.989e30  # 太阳质量(kg)
+G_SCENE = G / SCALE_FACTOR**3  # 场景单位下的引力常数
+
+# 计算加速度时每批最多处理的 (受力天体, 引力源) 对数，限制临时数组的内存占用
+ACCELERATION_CHUNK = 1 << 22
+BARNES_HUT_THETA = 0.5  # Barnes-Hut 默认张角，越小越精确
+OCTREE_MAX_DEPTH = 21  # 八叉树最大深度（每个坐标轴21位Morton编码）
+
+
+def compute_accelerations(positions, masses, g=G_SCENE, softening=0.0, out=None):
+    """
+    直接求和计算每个天体受到的引力加速度
+    只有质量大于0的天体作为引力源，质量为0的天体视为测试粒子，
+    因此开销为 O(N * 引力源数量)，大量小行星也能快速计算
+    """
+    n = len(positions)
+    if out is None:
+        out = np.zeros((n, 3))
+    else:
+        out[:] = 0.0
+
+    sources = np.flatnonzero(masses > 0)
+    if len(sources) == 0 or n == 0:
+        return out
+
+    source_pos = positions[sources]
+    source_gm = g * masses[sources]
+    eps2 = softening * softening
+
+    chunk = max(1, ACCELERATION_CHUNK // len(sources))
+    for start in range(0, n, chunk):
+        stop = min(start + chunk, n)
+        # (批大小, 引力源数, 3) 的相对位移
+        diff = source_pos[np.newaxis, :, :] - positions[start:stop, np.newaxis, :]
+        r2 = np.einsum('ijk,ijk->ij', diff, diff) + eps2
+        # 自身（以及重合天体）不产生引力
+        with np.errstate(divide='ignore'):
+            inv_r3 = np.where(r2 > 0, r2 ** -1.5, 0.0)
+        out[start:stop] = np.einsum('ij,ijk->ik', inv_r3 * source_gm, diff)
+
+    return out
+
+
+def _spread_bits(values):
+    """把21位整数的每一位间隔两位展开，用于生成Morton编码"""
+    x = values.astype(np.uint64) & np.uint64(0x1fffff)
+    x = (x | (x << np.uint64(32))) & np.uint64(0x1f00000000ffff)
+    x = (x | (x << np.uint64(16))) & np.uint64(0x1f0000ff0000ff)
+    x = (x | (x << np.uint64(8))) & np.uint64(0x100f00f00f00f00f)
+    x = (x | (x << np.uint64(4))) & np.uint64(0x10c30c30c30c30c3)
+    x = (x | (x << np.uint64(2))) & np.uint64(0x1249249249249249)
+    return x
+
+
+def build_octree(positions, masses, max_depth=OCTREE_MAX_DEPTH):
+    """
+    为引力源建立八叉树，节点按层展开保存在扁平数组中
+    天体先按Morton编码排序，同一节点的天体在排序后连续，
+    于是每一层的节点质量和质心都可以用 np.add.reduceat 一次求出
+    返回字典：mass, com, size, leaf, child_start, child_count
+    """
+    n = len(positions)
+    low = positions.min(axis=0)
+    size = float((positions.max(axis=0) - low).max()) * (1 + 1e-9) or 1.0
+    resolution = 1 << max_depth
+    cells = np.minimum(((positions - low) * (resolution / size)).astype(np.int64), resolution - 1)
+    codes = (_spread_bits(cells[:, 0]) << np.uint64(2)) | (_spread_bits(cells[:, 1]) << np.uint64(1)) \
+        | _spread_bits(cells[:, 2])
+
+    order = np.argsort(codes, kind='stable')
+    codes = codes[order]
+    mass = masses[order]
+    sorted_pos = positions[order]
+    weighted = sorted_pos * mass[:, np.newaxis]
+
+    total_mass = mass.sum()
+    node_mass = [np.array([total_mass])]
+    node_com = [sorted_pos[:1].copy() if n == 1 else weighted.sum(axis=0, keepdims=True) / total_mass]
+    node_size = [np.array([size])]
+    node_leaf = [np.array([n <= 1])]
+    parents = [np.zeros(0, dtype=np.int64)]
+    node_count = 1
+
+    # 当前层需要继续细分的天体（排序后的下标）及其所属节点
+    body = np.arange(n) if n > 1 else np.zeros(0, dtype=np.int64)
+    owner = np.zeros(len(body), dtype=np.int64)
+
+    for level in range(1, max_depth + 1):
+        if len(body) == 0:
+            break
+        key = codes[body] >> np.uint64(3 * (max_depth - level))
+        new_node = np.empty(len(body), dtype=bool)
+        new_node[0] = True
+        new_node[1:] = key[1:] != key[:-1]
+        starts = np.flatnonzero(new_node)
+        counts = np.diff(np.append(starts, len(body)))
+
+        level_mass = np.add.reduceat(mass[body], starts)
+        level_com = np.add.reduceat(weighted[body], starts) / level_mass[:, np.newaxis]
+        # 单个天体的节点直接使用原始位置，避免舍入误差让天体对自身产生引力
+        single = counts == 1
+        level_com[single] = sorted_pos[body[starts[single]]]
+        node_mass.append(level_mass)
+        node_com.append(level_com)
+        node_size.append(np.full(len(starts), size / (1 << level)))
+        leaf = single | (level == max_depth)
+        node_leaf.append(leaf)
+        parents.append(owner[starts])
+
+        # 只有非叶节点的天体进入下一层
+        node_of_body = np.cumsum(new_node) - 1
+        keep = ~leaf[node_of_body]
+        body = body[keep]
+        owner = node_count + node_of_body[keep]
+        node_count += len(starts)
+
+    # 同一父节点的子节点编号连续，记录起始编号和数量即可
+    parent = np.concatenate(parents)
+    child_start = np.zeros(node_count, dtype=np.int64)
+    child_count = np.zeros(node_count, dtype=np.int64)
+    unique_parent, first = np.unique(parent, return_index=True)
+    child_start[unique_parent] = first + 1
+    child_count[unique_parent] = np.diff(np.append(first, len(parent)))
+
+    return {
+        'mass': np.concatenate(node_mass),
+        'com': np.concatenate(node_com),
+        'size': np.concatenate(node_size),
+        'leaf': np.concatenate(node_leaf),
+        'child_start': child_start,
+        'child_count': child_count
+    }
+
+
+def barnes_hut_accelerations(positions, masses, g=G_SCENE, softening=0.0, out=None,
+                             theta=BARNES_HUT_THETA):
+    """
+    Barnes-Hut八叉树近似计算引力加速度，参数和返回值与 compute_accelerations 相同
+    节点边长与距离之比小于 theta 时把整个节点当作位于质心的单个质点
+    遍历时所有受力天体同时进行：每一轮对 (天体, 节点) 对批量判断是否接受，
+    不满足条件的节点展开为子节点进入下一轮
+    """
+    n = len(positions)
+    if out is None:
+        out = np.zeros((n, 3))
+    else:
+        out[:] = 0.0
+
+    sources = np.flatnonzero(masses > 0)
+    if len(sources) == 0 or n == 0:
+        return out
+
+    tree = build_octree(positions[sources], masses[sources])
+    gm = g * tree['mass']
+    com = tree['com']
+    size2 = tree['size'] ** 2
+    leaf = tree['leaf']
+    child_start = tree['child_start']
+    child_count = tree['child_count']
+    theta2 = theta * theta
+    eps2 = softening * softening
+
+    chunk = max(1, ACCELERATION_CHUNK // 64)
+    for start in range(0, n, chunk):
+        stop = min(start + chunk, n)
+        target_pos = positions[start:stop]
+        acc = out[start:stop]
+        target = np.arange(stop - start)
+        node = np.zeros(len(target), dtype=np.int64)
+
+        while len(target):
+            diff = com[node] - target_pos[target]
+            r2 = np.einsum('ij,ij->i', diff, diff) + eps2
+            accept = leaf[node] | (size2[node] < theta2 * r2)
+
+            t, d, r2a = target[accept], diff[accept], r2[accept]
+            with np.errstate(divide='ignore'):
+                weight = np.where(r2a > 0, gm[node[accept]] * r2a ** -1.5, 0.0)
+            for axis in range(3):
+                acc[:, axis] += np.bincount(t, weights=weight * d[:, axis], minlength=len(acc))
+
+            # 展开未被接受的节点
+            target, node = target[~accept], node[~accept]
+            counts = child_count[node]
+            total = counts.sum()
+            offsets = np.arange(total) - np.repeat(np.cumsum(counts) - counts, counts)
+            node = np.repeat(child_start[node], counts) + offsets
+            target = np.repeat(target, counts)
+
+    return out
+
+
+def make_barnes_hut_solver(theta=BARNES_HUT_THETA):
+    """返回给定张角的Barnes-Hut求解器，可直接作为 NBodySystem 的 force_solver"""
+    def solver(positions, masses, g=G_SCENE, softening=0.0, out=None):
+        return barnes_hut_accelerations(positions, masses, g, softening, out, theta)
+    return solver
+
+
+def circular_velocity(positions, center, central_mass, g=G_SCENE):
+    """计算绕中心天体在xz平面内做圆周运动的速度（逆时针，与场景中角度增加方向一致）"""
+    offset = np.atleast_2d(positions) - center
+    r = np.hypot(offset[:, 0], offset[:, 2])
+    speed = np.sqrt(g * central_mass / r)
+    velocity = np.zeros_like(offset)
+    velocity[:, 0] = -speed * offset[:, 2] / r
+    velocity[:, 2] = speed * offset[:, 0] / r
+    return velocity
+
+
+class NBodySystem:
+    """
+    N体系统：位置、速度、质量保存在连续的NumPy数组中
+    使用速度Verlet（kick-drift-kick蛙跳）积分，固定天体只产生引力、自身不移动
+    """
+
+    def __init__(self, g=G_SCENE, softening=0.0, force_solver=None):
+        self.g = g
+        self.softening = softening
+        # 引力求解器，签名与 compute_accelerations 相同
+        self.force_solver = force_solver or compute_accelerations
+        self.positions = np.zeros((0, 3))
+        self.velocities = np.zeros((0, 3))
+        self.masses = np.zeros(0)
+        self.fixed = np.zeros(0, dtype=bool)
+        self.time = 0.0
+        self._accelerations = None
+
+    @property
+    def count(self):
+        return len(self.masses)
+
+    def add_bodies(self, positions, velocities, masses, fixed=False):
+        """添加一批天体，返回它们在数组中的切片"""
+        positions = np.atleast_2d(np.asarray(positions, dtype=float))
+        n = len(positions)
+        velocities = np.broadcast_to(np.asarray(velocities, dtype=float), (n, 3))
+        masses = np.broadcast_to(np.asarray(masses, dtype=float), (n,))
+        fixed = np.broadcast_to(np.asarray(fixed, dtype=bool), (n,))
+
+        start = self.count
+        self.positions = np.concatenate((self.positions, positions))
+        self.velocities = np.concatenate((self.velocities, velocities))
+        self.masses = np.concatenate((self.masses, masses))
+        self.fixed = np.concatenate((self.fixed, fixed))
+        self.velocities[self.fixed] = 0.0
+        self._accelerations = None
+        return slice(start, start + n)
+
+    def accelerations(self):
+        """当前位置下的加速度（固定天体为0）"""
+        if self._accelerations is None:
+            self._accelerations = self.force_solver(self.positions, self.masses,
+                                                    self.g, self.softening)
+            self._accelerations[self.fixed] = 0.0
+        return self._accelerations
+
+    def step(self, dt, substeps=1):
+        """推进 dt 秒，内部分为 substeps 个蛙跳子步"""
+        h = dt / substeps
+        acc = self.accelerations()
+        for _ in range(substeps):
+            self.velocities += 0.5 * h * acc
+            self.positions += h * self.velocities
+            self._accelerations = None
+            acc = self.accelerations()
+            self.velocities += 0.5 * h * acc
+        self.time += dt
+
+    def energy(self):
+        """系统总能量（动能 + 引力势能），用于检验积分精度"""
+        kinetic = 0.5 * np.sum(self.masses * np.einsum('ij,ij->i', self.velocities, self.velocities))
+        sources = np.flatnonzero(self.masses > 0)
+        pos = self.positions[sources]
+        m = self.masses[sources]
+        diff = pos[:, np.newaxis, :] - pos[np.newaxis, :, :]
+        r = np.sqrt(np.einsum('ijk,ijk->ij', diff, diff) + self.softening**2)
+        i, j = np.triu_indices(len(sources), k=1)
+        potential = -self.g * np.sum(m[i] * m[j] / r[i, j])
+        return kinetic + potential
+
+
+def make_disk_system(n_bodies, inner_radius=2.2 * AU / SCALE_FACTOR,
+                     outer_radius=3.2 * AU / SCALE_FACTOR, n_planets=8, seed=0):
+    """
+    生成一个用于批量模拟的测试系统：固定的中心恒星、若干有质量的行星，
+    以及 n_bodies 个绕恒星做圆周运动的测试粒子
+    """
+    rng = np.random.default_rng(seed)
+    system = NBodySystem()
+    center = np.zeros(3)
+    system.add_bodies(center, 0.0, SUN_MASS, fixed=True)
+
+    orbit = np.linspace(0.4, 20.0, n_planets) * AU / SCALE_FACTOR
+    angle = rng.uniform(0, 2 * math.pi, n_planets)
+    planet_pos = np.column_stack((orbit * np.cos(angle), np.zeros(n_planets), orbit * np.sin(angle)))
+    system.add_bodies(planet_pos, circular_velocity(planet_pos, center, SUN_MASS), 1e26)
+
+    angle = rng.uniform(0, 2 * math.pi, n_bodies)
+    distance = rng.uniform(inner_radius, outer_radius, n_bodies)
+    height = rng.uniform(-0.1, 0.1, n_bodies) * inner_radius
+    body_pos = np.column_stack((distance * np.cos(angle), height, distance * np.sin(angle)))
+    system.add_bodies(body_pos, circular_velocity(body_pos, center, SUN_MASS), 0.0)
+    return system
+
+
+def run_headless(n_bodies=5000, steps=200, dt=86400.0, substeps=4, seed=0, theta=None):
+    """无界面批量模拟，输出吞吐量（天体·步/秒）；给定 theta 时使用Barnes-Hut求解器"""
+    system = make_disk_system(n_bodies, seed=seed)
+    if theta is not None:
+        system.force_solver = make_barnes_hut_solver(theta)
+    system.accelerations()
+    energy_start = system.energy()
+
+    start = time.perf_counter()
+    for _ in range(steps):
+        system.step(dt, substeps)
+    elapsed = time.perf_counter() - start
+
+    drift = abs((system.energy() - energy_start) / energy_start)
+    throughput = system.count * steps * substeps / elapsed
+    print(f"{system.count} 个天体, {steps} 步 x {substeps} 子步, 用时 {elapsed:.3f} 秒")
+    print(f"吞吐量 {throughput:,.0f} 天体·步/秒, 相对能量漂移 {drift:.2e}")
+    return throughput
+
+
+def benchmark_force_solvers(sizes=(250, 500, 1000, 2000, 4000, 8000, 16000),
+                            theta=BARNES_HUT_THETA, seed=0):
+    """
+    对比直接求和与Barnes-Hut在不同天体数下的耗时和误差，
+    返回 Barnes-Hut 开始快于直接求和的天体数（若未出现则为 None）
+    """
+    rng = np.random.default_rng(seed)
+    solver = make_barnes_hut_solver(theta)
+    softening = 0.01 * AU / SCALE_FACTOR
+    crossover = None
+
+    print(f"theta = {theta}")
+    print(f"{'天体数':>8} {'直接求和(ms)':>14} {'Barnes-Hut(ms)':>16} {'加速比':>8} {'相对RMS误差':>12}")
+    for n in sizes:
+        # 中心聚集的随机星团，所有天体都有质量
+        radius = 50 * AU / SCALE_FACTOR * rng.uniform(0, 1, n) ** 2
+        direction = rng.normal(size=(n, 3))
+        direction /= np.linalg.norm(direction, axis=1, keepdims=True)
+        positions = direction * radius[:, np.newaxis]
+        masses = rng.uniform(0.1, 1.0, n) * SUN_MASS
+
+        start = time.perf_counter()
+        exact = compute_accelerations(positions, masses, softening=softening)
+        direct_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        approx = solver(positions, masses, softening=softening)
+        tree_time = time.perf_counter() - start
+
+        error = np.sqrt(np.mean(np.sum((approx - exact) ** 2, axis=1)) / np.mean(np.sum(exact ** 2, axis=1)))
+        speedup = direct_time / tree_time
+        if crossover is None and speedup > 1:
+            crossover = n
+        print(f"{n:>8} {direct_time * 1000:>14.1f} {tree_time * 1000:>16.1f} {speedup:>8.2f} {error:>12.2e}")
+
+    print(f"交叉点: {crossover if crossover is not None else '未出现'}")
+    return crossover
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="无界面N体模拟")
+    parser.add_argument("--bodies", type=int, default=5000, help="测试粒子数量")
+    parser.add_argument("--steps", type=int, default=200, help="模拟步数")
+    parser.add_argument("--dt", type=float, default=86400.0, help="每步的物理时间（秒）")
+    parser.add_argument("--substeps", type=int, default=4, help="每步的蛙跳子步数")
+    parser.add_argument("--seed", type=int, default=0, help="随机种子")
+    parser.add_argument("--bench-forces", action="store_true", help="对比直接求和与Barnes-Hut的耗时和误差")
+    parser.add_argument("--barnes-hut", action="store_true", help="模拟时使用Barnes-Hut求解器")
+    parser.add_argument("--theta", type=float, default=BARNES_HUT_THETA, help="Barnes-Hut张角")
+    args = parser.parse_args()
+    if args.bench_forces:
+        benchmark_force_solvers(theta=args.theta, seed=args.seed)
+    else:
+        run_headless(args.bodies, args.steps, args.dt, args.substeps, args.seed,
+                     args.theta if args.barnes_hut else None)
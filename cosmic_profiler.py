@@ -0,0 +1,170 @@
+"""
+帧耗时分析 - Cosmic Profiler
+按帧记录各个更新阶段的耗时和场景对象的创建/销毁数量，
+维护滚动窗口内的 p50/p95/p99，并可导出CSV/JSON逐帧记录，用于对比不同版本
+纯Python + NumPy实现，不依赖vpython
+
+对比两次记录：python cosmic_profiler.py --compare before.json after.json
+"""
+
+import argparse
+import contextlib
+import csv
+import json
+import time
+from collections import deque
+import numpy as np
+
+PROFILE_WINDOW = 300  # 滚动百分位使用的帧数（30fps下约10秒）
+PERCENTILES = (50, 95, 99)
+FRAME_SECTION = "frame"  # 整帧工作耗时（不含 vp.rate 的等待）
+INTERVAL_SECTION = "interval"  # 相邻两帧开始时刻的间隔（含等待）
+
+_NULL_SECTION = contextlib.nullcontext()
+
+
+class FrameProfiler:
+    """
+    逐帧分析器：begin_frame/end_frame 之间用 section(name) 计时，用 count(name, n) 计数
+    同一帧内同名阶段多次计时会累加；enabled 为 False 时所有调用都是空操作
+    """
+
+    def __init__(self, enabled=True, window=PROFILE_WINDOW):
+        self.enabled = enabled
+        self.window = window
+        self.history = {}  # 阶段名 -> 最近 window 帧的耗时(ms)
+        self.rows = []  # 逐帧记录，导出为trace
+        self.totals = {}  # 计数器累计值
+        self.frame_index = 0
+        self._current = {}
+        self._counts = {}
+        self._frame_start = None
+        self._last_start = None
+
+    def begin_frame(self):
+        if not self.enabled:
+            return
+        now = time.perf_counter()
+        self._current = {}
+        self._counts = {}
+        if self._last_start is not None:
+            self._current[INTERVAL_SECTION] = (now - self._last_start) * 1000.0
+        self._frame_start = self._last_start = now
+
+    @contextlib.contextmanager
+    def _timed(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = (time.perf_counter() - start) * 1000.0
+            self._current[name] = self._current.get(name, 0.0) + elapsed
+
+    def section(self, name):
+        """计时上下文：with profiler.section("update_star"): ..."""
+        if not self.enabled:
+            return _NULL_SECTION
+        return self._timed(name)
+
+    def count(self, name, n=1):
+        """累加本帧的计数（如创建/销毁的场景对象数）"""
+        if self.enabled and n:
+            self._counts[name] = self._counts.get(name, 0) + n
+
+    def end_frame(self):
+        if not self.enabled or self._frame_start is None:
+            return
+        self._current[FRAME_SECTION] = (time.perf_counter() - self._frame_start) * 1000.0
+        for name, ms in self._current.items():
+            if name not in self.history:
+                self.history[name] = deque(maxlen=self.window)
+            self.history[name].append(ms)
+        for name, n in self._counts.items():
+            self.totals[name] = self.totals.get(name, 0) + n
+
+        row = {'frame': self.frame_index}
+        row.update({f"{name}_ms": round(ms, 4) for name, ms in self._current.items()})
+        row.update(self._counts)
+        self.rows.append(row)
+        self.frame_index += 1
+        self._frame_start = None
+
+    def percentiles(self, name):
+        """某阶段在滚动窗口内的 (p50, p95, p99)，单位毫秒"""
+        samples = self.history.get(name)
+        if not samples:
+            return (0.0,) * len(PERCENTILES)
+        return tuple(np.percentile(np.fromiter(samples, dtype=float), PERCENTILES).tolist())
+
+    def summary(self):
+        """{阶段名: {'p50', 'p95', 'p99'}}，外加计数器累计值"""
+        result = {
+            name: dict(zip((f"p{p}" for p in PERCENTILES), self.percentiles(name)))
+            for name in self.history
+        }
+        return {'frames': self.frame_index, 'sections': result, 'counters': dict(self.totals)}
+
+    def overlay_text(self):
+        """屏幕叠加显示用的多行文本，按p95从高到低排列"""
+        lines = [f"帧 {self.frame_index}   (p50 / p95 / p99 ms)"]
+        stats = sorted(((name, self.percentiles(name)) for name in self.history),
+                       key=lambda item: -item[1][1])
+        for name, (p50, p95, p99) in stats:
+            lines.append(f"{name}: {p50:.2f} / {p95:.2f} / {p99:.2f}")
+        if self.totals:
+            lines.append("  ".join(f"{name}: {n}" for name, n in sorted(self.totals.items())))
+        return "\n".join(lines)
+
+    def write_trace(self, path):
+        """导出逐帧记录：.csv 为逐帧表格，.json 额外包含汇总"""
+        if path.endswith(".csv"):
+            columns = ['frame']
+            for row in self.rows:
+                columns.extend(key for key in row if key not in columns)
+            with open(path, 'w', newline='') as f:
+                writer = csv.DictWriter(f, fieldnames=columns, restval=0)
+                writer.writeheader()
+                writer.writerows(self.rows)
+        else:
+            with open(path, 'w') as f:
+                json.dump({'summary': self.summary(), 'frames': self.rows}, f, ensure_ascii=False, indent=1)
+
+
+def load_trace(path):
+    """读取trace文件，返回 {阶段名: 全部逐帧耗时数组}"""
+    if path.endswith(".csv"):
+        with open(path, newline='') as f:
+            rows = list(csv.DictReader(f))
+    else:
+        with open(path) as f:
+            rows = json.load(f)['frames']
+    names = sorted({key for row in rows for key in row if key.endswith("_ms")})
+    return {name[:-3]: np.array([float(row.get(name) or 0.0) for row in rows]) for name in names}
+
+
+def compare_traces(path_a, path_b):
+    """逐阶段对比两次记录的百分位耗时"""
+    a, b = load_trace(path_a), load_trace(path_b)
+    print(f"{'阶段':<20}" + "".join(f"{f'p{p} A':>10}{f'p{p} B':>10}{'变化':>9}" for p in PERCENTILES))
+    for name in sorted(set(a) | set(b)):
+        cells = []
+        for p in PERCENTILES:
+            va = float(np.percentile(a[name], p)) if name in a and len(a[name]) else 0.0
+            vb = float(np.percentile(b[name], p)) if name in b and len(b[name]) else 0.0
+            change = f"{(vb - va) / va * 100:+.1f}%" if va > 0 else "-"
+            cells.append(f"{va:>10.3f}{vb:>10.3f}{change:>9}")
+        print(f"{name:<20}" + "".join(cells))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="帧耗时记录工具")
+    parser.add_argument("--compare", nargs=2, metavar=("A", "B"), help="对比两份trace文件(.csv/.json)")
+    args = parser.parse_args()
+    if args.compare:
+        compare_traces(*args.compare)
+    else:
+        parser.print_help()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,412 @@
+"""
+宇宙场景离线录制 - Cosmic Recorder
+按固定步长推进 CosmicSimulation，用NumPy软件光栅化把每一帧画成RGB图像，
+由后台写出线程保存为PNG序列，或以原始RGB24流通过管道交给本地编码器（如ffmpeg）
+模拟和光栅化在主线程，压缩和写出在写出线程（zlib压缩和管道写入会释放GIL），录制不受浏览器刷新和屏幕录制的限制
+纯NumPy实现，不依赖vpython；画面是场景的简化近似，不与vpython画面逐像素一致
+
+PNG序列：python cosmic_recorder.py --frames 300 --png frames
+视频：  python cosmic_recorder.py --frames 300 --video cosmic.mp4
+"""
+
+import argparse
+import math
+import os
+import queue
+import shlex
+import subprocess
+import sys
+import threading
+import time
+import numpy as np
+from cosmic_physics import SCALE_FACTOR, AU
+from cosmic_visibility import Camera
+from cosmic_nebula import write_png
+from cosmic_scene import load_or_generate_scene, scene_group, NEBULAE, PULSAR_POS, PULSAR_RADIUS
+from cosmic_simulation import CosmicSimulation, FixedStepClock, InterpolatedState, PHYSICS_MODE
+
+RECORD_WIDTH = 1280  # 输出图像宽度（像素）
+RECORD_HEIGHT = 720  # 输出图像高度（像素）
+RECORD_FPS = 30  # 输出帧率；模拟仍按 cosmic_simulation.TICK_RATE 的固定步长推进，输出帧之间插值
+RECORD_QUEUE_SIZE = 16  # 等待写出的帧队列容量
+RECORD_QUEUE_POLICY = "block"  # 队列满时："block" 等待写出线程（不丢帧）；"drop" 丢弃该帧，模拟从不等待
+PNG_COMPRESSION = 1  # PNG的zlib压缩级别，越低写出越快、文件越大
+REPORT_INTERVAL = 30  # 进度输出间隔（帧数）
+# 原始RGB24流的默认编码命令，{width} {height} {fps} {output} 会被替换
+ENCODER_COMMAND = ("ffmpeg -y -loglevel error -f rawvideo -pix_fmt rgb24 -s {width}x{height} -r {fps} -i - "
+                   "-c:v libx264 -pix_fmt yuv420p {output}")
+# 摄像机与 cosmic_visualization 的初始视角一致
+CAMERA_RANGE = 5 * AU / SCALE_FACTOR
+CAMERA_FORWARD = (0, -1, -2)
+CAMERA_FOV = math.pi / 6
+CAMERA_ORBIT_SPEED = 0.0  # 摄像机绕场景中心水平旋转的速度（弧度/秒），0 为固定视角
+RING_SAMPLES = 180  # 每个吸积盘圆环的采样点数
+BEAM_SAMPLES = 64  # 每条脉冲星光束的采样点数
+DISK_STAMP_RADIUS = 8  # 投影半径（像素）小于该值的圆盘批量绘制
+STAR_COLOR = (1.0, 1.0, 0.0)
+
+
+class PngSequenceSink:
+    """把每帧写成 directory 下编号连续的PNG文件"""
+
+    def __init__(self, directory, level=PNG_COMPRESSION, pattern="frame_{:05d}.png"):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.level = level
+        self.pattern = pattern
+
+    def write(self, index, frame):
+        write_png(os.path.join(self.directory, self.pattern.format(index)), frame, self.level)
+
+    def close(self):
+        pass
+
+
+class PipeSink:
+    """把原始RGB24帧依次写入编码器进程的标准输入"""
+
+    def __init__(self, command):
+        self.command = command
+        self.process = subprocess.Popen(command, stdin=subprocess.PIPE)
+
+    def write(self, index, frame):
+        self.process.stdin.write(memoryview(frame).cast('B'))
+
+    def close(self):
+        try:
+            self.process.stdin.close()
+        except BrokenPipeError:
+            pass
+        code = self.process.wait()
+        if code:
+            raise RuntimeError(f"编码器退出码 {code}: {' '.join(self.command)}")
+
+
+def encoder_command(output, width, height, fps, template=ENCODER_COMMAND):
+    """按模板生成编码器命令行（参数列表）"""
+    return [arg.format(width=width, height=height, fps=fps, output=output) for arg in shlex.split(template)]
+
+
+class FrameWriter:
+    """
+    后台写出线程：submit() 把帧放入有界队列后立即返回，写出线程按顺序交给 sink 保存
+    policy 为 "block" 时队列满会等待写出线程（不丢帧），为 "drop" 时丢弃该帧，调用方从不等待
+    提交后的帧数组归写出线程所有，调用方不能再修改
+    """
+
+    def __init__(self, sink, queue_size=RECORD_QUEUE_SIZE, policy=RECORD_QUEUE_POLICY):
+        self.sink = sink
+        self.queue_size = queue_size
+        self.policy = policy
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.submitted = 0
+        self.written = 0
+        self.dropped = 0
+        self.max_depth = 0
+        self.depth_total = 0  # 每次提交时队列深度的累计，用于求平均深度
+        self.blocked_time = 0.0  # submit 等待队列空位的累计时间（秒）
+        self.write_time = 0.0  # 写出线程实际写帧的累计时间（秒）
+        self.error = None
+        self.start_time = time.perf_counter()
+        self.thread = threading.Thread(target=self._run, name="frame-writer", daemon=True)
+        self.thread.start()
+
+    def _run(self):
+        while True:
+            item = self.queue.get()
+            if item is None:
+                break
+            if self.error is not None:
+                continue  # 出错后继续取走队列中的帧，避免提交方一直阻塞
+            index, frame = item
+            start = time.perf_counter()
+            try:
+                self.sink.write(index, frame)
+            except Exception as exc:
+                self.error = exc
+            else:
+                self.written += 1
+                self.write_time += time.perf_counter() - start
+
+    def submit(self, frame):
+        """提交一帧，返回是否进入队列（"drop" 策略下队列满时返回 False）"""
+        if self.error is not None:
+            raise RuntimeError("帧写出失败") from self.error
+        depth = self.queue.qsize()
+        self.max_depth = max(self.max_depth, depth)
+        self.depth_total += depth
+        index = self.submitted
+        self.submitted += 1
+        if self.policy == "drop":
+            try:
+                self.queue.put_nowait((index, frame))
+            except queue.Full:
+                self.dropped += 1
+                return False
+        else:
+            start = time.perf_counter()
+            self.queue.put((index, frame))
+            self.blocked_time += time.perf_counter() - start
+        return True
+
+    def close(self):
+        """写完队列中剩余的帧并关闭 sink"""
+        if self.thread.is_alive():
+            self.queue.put(None)
+            self.thread.join()
+            self.sink.close()
+        if self.error is not None:
+            raise RuntimeError("帧写出失败") from self.error
+
+    def stats(self):
+        elapsed = time.perf_counter() - self.start_time
+        return {
+            'submitted': self.submitted,
+            'written': self.written,
+            'dropped': self.dropped,
+            'queue_depth': self.queue.qsize(),
+            'max_queue_depth': self.max_depth,
+            'mean_queue_depth': self.depth_total / self.submitted if self.submitted else 0.0,
+            'written_fps': self.written / elapsed if elapsed > 0 else 0.0,  # 实际持续写出速度
+            'writer_fps': self.written / self.write_time if self.write_time > 0 else 0.0,  # 写出线程单独的能力
+            'blocked_time': self.blocked_time
+        }
+
+
+def camera_at(time_s, aspect):
+    """第 time_s 秒的摄像机：从场景中心后方看向中心，可以绕竖直轴缓慢旋转"""
+    forward = np.asarray(CAMERA_FORWARD, dtype=float)
+    angle = CAMERA_ORBIT_SPEED * time_s
+    cos_a, sin_a = math.cos(angle), math.sin(angle)
+    forward = np.array([cos_a * forward[0] + sin_a * forward[2], forward[1],
+                        -sin_a * forward[0] + cos_a * forward[2]])
+    forward /= np.linalg.norm(forward)
+    distance = CAMERA_RANGE / math.tan(CAMERA_FOV / 2)
+    return Camera(-forward * distance, forward, fov=CAMERA_FOV, aspect=aspect)
+
+
+class SceneRasterizer:
+    """
+    把模拟状态画成 (H, W, 3) uint8 图像的简易软件光栅化
+    背景星空、星云、日冕、吸积盘和黑洞粒子按加法混合画成光点（所有光点合并成一批累加），
+    恒星、行星、小行星、黑洞核心和脉冲星按由远到近的顺序画成实心圆盘，投影后不足一个像素的按光点处理
+    """
+
+    def __init__(self, scene_data, width=RECORD_WIDTH, height=RECORD_HEIGHT):
+        self.width = width
+        self.height = height
+        stars = scene_group(scene_data, 'stars')
+        self.star_points = (np.asarray(stars['positions'], dtype=float), np.asarray(stars['colors'], dtype=float),
+                            np.asarray(stars['radii'], dtype=float))
+        nebulae = [scene_group(scene_data, f'nebula{k}') for k in range(len(NEBULAE))]
+        self.nebula_points = tuple(np.concatenate([np.asarray(n[name], dtype=float) for n in nebulae])
+                                   for name in ('positions', 'colors', 'radii'))
+        self.planet_colors = np.asarray(scene_data['planets.color'], dtype=float)
+        asteroids = scene_group(scene_data, 'asteroids')
+        self.asteroid_colors = np.asarray(asteroids['colors'], dtype=float)
+        self.asteroid_radii = np.asarray(asteroids['radii'], dtype=float)
+        self.ring_points = None  # 吸积盘圆环旋转对称，采样点在第一次绘制时生成一次
+
+    def project(self, camera, positions):
+        """透视投影，返回像素坐标 x, y、深度和每单位半径对应的像素数"""
+        forward = camera.forward
+        right = np.cross(forward, camera.up)
+        right /= np.linalg.norm(right)
+        up = np.cross(right, forward)
+        offset = positions - camera.pos
+        depth = offset @ forward
+        focal = (self.height / 2) / math.tan(camera.fov / 2)
+        scale = focal / np.maximum(depth, 1e-9)
+        x = self.width / 2 + (offset @ right) * scale
+        y = self.height / 2 - (offset @ up) * scale
+        return x, y, depth, scale
+
+    def _accretion_rings(self, state):
+        n = len(state.ring_radius)
+        angles = np.linspace(0, 2 * np.pi, RING_SAMPLES, endpoint=False)
+        positions, colors = [], []
+        for i, r in enumerate(state.ring_radius.tolist()):
+            positions.append(np.column_stack((r * np.cos(angles), np.zeros(RING_SAMPLES), r * np.sin(angles))))
+            opacity = 0.7 - i / n * 0.5
+            colors.append(np.tile([opacity, (0.5 - i / n / 2) * opacity, 0.1 * opacity], (RING_SAMPLES, 1)))
+        positions = np.concatenate(positions) + state.black_hole_pos
+        radii = np.full(len(positions), state.black_hole_radius * 0.05)
+        return positions, np.concatenate(colors), radii
+
+    def _pulsar_beams(self, state):
+        angle = state.pulsar_angle
+        brightness = state.pulsar_brightness if state.pulsar_brightness is not None else 1.0
+        axis = np.array([math.sin(angle), math.cos(angle), 0.0]) * PULSAR_RADIUS * 10
+        t = np.linspace(-1, 1, 2 * BEAM_SAMPLES)[:, np.newaxis]
+        positions = np.asarray(PULSAR_POS) + t * axis
+        color = np.array([brightness, brightness, 1.0]) * brightness * 0.6
+        return positions, np.tile(color, (len(positions), 1)), np.full(len(positions), PULSAR_RADIUS)
+
+    def draw(self, state, camera):
+        """绘制一帧，返回新分配的 (H, W, 3) uint8 数组"""
+        if self.ring_points is None:
+            self.ring_points = self._accretion_rings(state)
+        n = len(state.corona_positions)
+        corona_colors = np.outer(state.corona['opacity'], STAR_COLOR)
+        bh_colors = np.tile([1.0, 0.3, 0.1], (len(state.bh_positions), 1))
+
+        # 实心天体：恒星、行星、小行星、黑洞核心、脉冲星
+        brightness = state.pulsar_brightness if state.pulsar_brightness is not None else 1.0
+        solids = (
+            (state.star_pos[np.newaxis], np.array([STAR_COLOR]), np.array([state.star_radius]), False),
+            (state.planet_positions, self.planet_colors, state.planet_radius, True),
+            (state.asteroid_positions, self.asteroid_colors, self.asteroid_radii, True),
+            (state.black_hole_pos[np.newaxis], np.zeros((1, 3)), np.array([state.black_hole_radius]), False),
+            (np.array([PULSAR_POS], dtype=float), np.full((1, 3), brightness), np.array([PULSAR_RADIUS]), False)
+        )
+        glows = [self.star_points, self.nebula_points, self.ring_points, self._pulsar_beams(state),
+                 (state.corona_positions, corona_colors, np.full(n, state.star_radius * 0.05)),
+                 (state.bh_positions, bh_colors, np.full(len(state.bh_positions), state.black_hole_radius * 0.05))]
+
+        disks = []
+        for positions, colors, radii, shaded in solids:
+            x, y, depth, scale = self.project(camera, positions)
+            r = radii * scale
+            big = (r >= 1.0) & (depth > 0)
+            glows.append((positions[~big], colors[~big], radii[~big]))
+            disks.append((x[big], y[big], r[big], depth[big], colors[big], np.full(big.sum(), shaded)))
+
+        image = self._splat(camera, *(np.concatenate(values) for values in zip(*glows)))
+        x, y, r, depth, colors, shaded = (np.concatenate(values) for values in zip(*disks))
+        zbuffer = np.full((self.height, self.width), np.inf, dtype=np.float32)
+        # 小圆盘（小行星、远处的行星）用同一个模板一次画完，大圆盘逐个画；两者都通过深度缓冲决定遮挡
+        small = r < DISK_STAMP_RADIUS
+        self._stamp_disks(image, zbuffer, x[small], y[small], r[small], depth[small], colors[small], shaded[small])
+        for i in np.flatnonzero(~small).tolist():
+            self._fill_disk(image, zbuffer, x[i], y[i], r[i], depth[i], colors[i], shaded[i])
+        np.clip(image, 0.0, 1.0, out=image)
+        image *= 255
+        return image.astype(np.uint8)
+
+    def _splat(self, camera, positions, colors, radii):
+        """光点按覆盖面积加权累加到所在像素，返回 (H, W, 3) float32 图像"""
+        x, y, depth, scale = self.project(camera, positions)
+        ix, iy = np.floor(x).astype(np.int64), np.floor(y).astype(np.int64)
+        inside = (depth > 0) & (ix >= 0) & (ix < self.width) & (iy >= 0) & (iy < self.height)
+        coverage = np.clip(np.pi * (radii * scale) ** 2, 0.25, 1.0)[inside]
+        # 光点只落在少数像素上：先在被命中的像素之间累加，再写入整幅图像
+        pixels, slot = np.unique(iy[inside] * self.width + ix[inside], return_inverse=True)
+        weighted = colors[inside] * coverage[:, np.newaxis]
+        image = np.zeros((self.height * self.width, 3), dtype=np.float32)
+        image[pixels] = np.column_stack([np.bincount(slot, weights=weighted[:, c], minlength=len(pixels))
+                                         for c in range(3)])
+        return image.reshape(self.height, self.width, 3)
+
+    @staticmethod
+    def _disk_color(d2, color, shaded):
+        """圆盘上的颜色，shaded 为 True 时边缘变暗以显示球体"""
+        shade = np.where(shaded, 0.4 + 0.6 * np.sqrt(np.maximum(1.0 - d2, 0.0)), 1.0)
+        return color * shade[..., np.newaxis]
+
+    def _stamp_disks(self, image, zbuffer, x, y, r, depth, colors, shaded):
+        """批量画半径小于 DISK_STAMP_RADIUS 的圆盘：每个圆盘取同样大小的像素模板，同一像素保留最近的圆盘"""
+        if len(x) == 0:
+            return
+        reach = int(math.ceil(r.max()))
+        offsets = np.arange(-reach, reach + 1)
+        px = np.floor(x).astype(np.int64)[:, np.newaxis, np.newaxis] + offsets[np.newaxis, np.newaxis, :]
+        py = np.floor(y).astype(np.int64)[:, np.newaxis, np.newaxis] + offsets[np.newaxis, :, np.newaxis]
+        d2 = ((px + 0.5 - x[:, np.newaxis, np.newaxis]) ** 2 +
+              (py + 0.5 - y[:, np.newaxis, np.newaxis]) ** 2) / (r * r)[:, np.newaxis, np.newaxis]
+        mask = (d2 <= 1.0) & (px >= 0) & (px < self.width) & (py >= 0) & (py < self.height)
+        disk = np.nonzero(mask)[0]
+        pixel = (py * self.width + px)[mask]
+        # 按 (像素, 深度) 排序后每个像素取第一个，即最近的圆盘
+        order = np.lexsort((depth[disk], pixel))
+        pixel, first = np.unique(pixel[order], return_index=True)
+        disk, d2 = disk[order][first], d2[mask][order][first]
+        nearer = depth[disk] < zbuffer.reshape(-1)[pixel]
+        pixel, disk, d2 = pixel[nearer], disk[nearer], d2[nearer]
+        zbuffer.reshape(-1)[pixel] = depth[disk]
+        image.reshape(-1, 3)[pixel] = self._disk_color(d2, colors[disk], shaded[disk])
+
+    def _fill_disk(self, image, zbuffer, x, y, r, depth, color, shaded):
+        """画一个大圆盘，只覆盖深度缓冲中更远的像素"""
+        x0, x1 = max(int(x - r), 0), min(int(x + r) + 1, self.width)
+        y0, y1 = max(int(y - r), 0), min(int(y + r) + 1, self.height)
+        if x0 >= x1 or y0 >= y1:
+            return
+        yy, xx = np.ogrid[y0:y1, x0:x1]
+        d2 = ((xx + 0.5 - x) ** 2 + (yy + 0.5 - y) ** 2) / (r * r)
+        depths = zbuffer[y0:y1, x0:x1]
+        mask = (d2 <= 1.0) & (depth < depths)
+        depths[mask] = depth
+        image[y0:y1, x0:x1][mask] = self._disk_color(d2[mask], color, shaded)
+
+
+def record(sink, frames=300, seed=2024, width=RECORD_WIDTH, height=RECORD_HEIGHT, fps=RECORD_FPS,
+           queue_size=RECORD_QUEUE_SIZE, policy=RECORD_QUEUE_POLICY, physics_mode=PHYSICS_MODE,
+           cache_dir="scene_cache"):
+    """离线录制 frames 帧，返回写出统计"""
+    scene_data = load_or_generate_scene(seed, cache_dir)
+    sim = CosmicSimulation(scene_data, seed, physics_mode)
+    state = InterpolatedState(sim)
+    # 离线录制不受实时限制：不设步数上限、单帧时间上限和时间预算，每个输出帧精确推进 1/fps 秒
+    clock = FixedStepClock(max_ticks=sys.maxsize, max_frame_time=math.inf, budget=math.inf)
+    rasterizer = SceneRasterizer(scene_data, width, height)
+    writer = FrameWriter(sink, queue_size, policy)
+    aspect = width / height
+
+    simulate_time = draw_time = 0.0
+    try:
+        for frame in range(frames):
+            start = time.perf_counter()
+            for dt in clock.advance(1.0 / fps):
+                state.capture()
+                sim.step(dt)
+            state.update(clock.alpha)
+            middle = time.perf_counter()
+            image = rasterizer.draw(state, camera_at(frame / fps, aspect))
+            simulate_time += middle - start
+            draw_time += time.perf_counter() - middle
+            writer.submit(image)
+
+            if (frame + 1) % REPORT_INTERVAL == 0:
+                stats = writer.stats()
+                print(f"帧 {frame + 1}/{frames}  写出 {stats['written']} ({stats['written_fps']:.1f} 帧/秒)  "
+                      f"队列 {stats['queue_depth']}/{queue_size}  丢弃 {stats['dropped']}")
+    finally:
+        writer.close()
+
+    stats = writer.stats()
+    stats.update(simulate_ms=simulate_time / frames * 1000.0, draw_ms=draw_time / frames * 1000.0)
+    print(f"共 {frames} 帧 {width}x{height}: 写出 {stats['written']}, 丢弃 {stats['dropped']}, "
+          f"持续写出 {stats['written_fps']:.1f} 帧/秒（写出线程上限 {stats['writer_fps']:.1f} 帧/秒）")
+    print(f"每帧模拟 {stats['simulate_ms']:.2f} ms, 光栅化 {stats['draw_ms']:.2f} ms, "
+          f"队列最大深度 {stats['max_queue_depth']}, 平均深度 {stats['mean_queue_depth']:.1f}, "
+          f"等待写出共 {stats['blocked_time']:.2f} 秒")
+    return stats
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="宇宙场景离线录制")
+    parser.add_argument("--frames", type=int, default=300, help="录制的帧数")
+    parser.add_argument("--seed", type=int, default=2024, help="场景随机种子")
+    parser.add_argument("--width", type=int, default=RECORD_WIDTH, help="图像宽度")
+    parser.add_argument("--height", type=int, default=RECORD_HEIGHT, help="图像高度")
+    parser.add_argument("--fps", type=int, default=RECORD_FPS, help="输出帧率")
+    output = parser.add_mutually_exclusive_group()
+    output.add_argument("--png", metavar="DIR", help="写成PNG序列（默认 frames 目录）")
+    output.add_argument("--video", metavar="PATH", help="通过ffmpeg编码为视频文件")
+    output.add_argument("--pipe", metavar="CMD", help="自定义编码命令，从标准输入读取RGB24原始帧，"
+                                                      "可使用 {width} {height} {fps} 占位符")
+    parser.add_argument("--queue", type=int, default=RECORD_QUEUE_SIZE, help="写出队列容量")
+    parser.add_argument("--policy", choices=("block", "drop"), default=RECORD_QUEUE_POLICY, help="队列满时的处理")
+    parser.add_argument("--level", type=int, default=PNG_COMPRESSION, help="PNG压缩级别(0-9)")
+    parser.add_argument("--physics", choices=("nbody", "kinematic"), default=PHYSICS_MODE, help="运动模式")
+    parser.add_argument("--cache-dir", default="scene_cache", help="场景文件缓存目录")
+    args = parser.parse_args()
+
+    if args.video:
+        sink = PipeSink(encoder_command(args.video, args.width, args.height, args.fps))
+    elif args.pipe:
+        sink = PipeSink(encoder_command("", args.width, args.height, args.fps, args.pipe))
+    else:
+        sink = PngSequenceSink(args.png or "frames", args.level)
+    record(sink, args.frames, args.seed, args.width, args.height, args.fps, args.queue, args.policy,
+           args.physics, args.cache_dir)
@@ -0,0 +1,202 @@
+"""
+宇宙场景描述 - Cosmic Scene
+由显式的随机种子生成场景中所有随机量，结果是一组紧凑的NumPy数组，
+保存为未压缩的 .npz 场景文件；再次启动时直接内存映射该文件，无需重新生成
+纯NumPy实现，不依赖vpython
+"""
+
+import hashlib
+import os
+import struct
+import zipfile
+import numpy as np
+from cosmic_physics import SCALE_FACTOR, AU, G, SUN_MASS
+from cosmic_nebula import generate_nebula_particles, NEBULA_POINTS
+
+SCENE_VERSION = 1  # 生成算法版本，修改后递增以使旧场景文件失效
+
+# 场景布局（场景单位）
+SKY_RADIUS = 100 * AU / SCALE_FACTOR  # 背景星空半径
+NUM_STARS = 3000  # 背景星星数量
+STAR_RADIUS = 0.5 * AU / SCALE_FACTOR  # 中央恒星半径
+NUM_CORONA_PARTICLES = 100  # 日冕粒子数量
+NUM_ROCKY_PLANETS = 4  # 类地行星数量
+NUM_GAS_PLANETS = 4  # 气态行星数量
+ASTEROID_INNER_RADIUS = 2.2 * AU / SCALE_FACTOR  # 小行星带内径
+ASTEROID_OUTER_RADIUS = 3.2 * AU / SCALE_FACTOR  # 小行星带外径
+NUM_ASTEROIDS = 200  # 小行星数量
+NEBULAE = (
+    {'pos': (30 * AU / SCALE_FACTOR, 5 * AU / SCALE_FACTOR, -10 * AU / SCALE_FACTOR),
+     'size': 5 * AU / SCALE_FACTOR,
+     'color': (0.2, 0.5, 1.0)},  # 蓝色星云
+    {'pos': (-25 * AU / SCALE_FACTOR, -8 * AU / SCALE_FACTOR, 15 * AU / SCALE_FACTOR),
+     'size': 8 * AU / SCALE_FACTOR,
+     'color': (1.0, 0.2, 0.5)},  # 红色星云
+)
+BLACK_HOLE_POS = (-15 * AU / SCALE_FACTOR, 0, -20 * AU / SCALE_FACTOR)
+BLACK_HOLE_MASS = 8e30  # 质量(kg)
+BLACK_HOLE_RADIUS = 0.8 * AU / SCALE_FACTOR
+NUM_BLACK_HOLE_PARTICLES = 2000  # 黑洞附近的粒子数量（以点云显示，可以增加到数万）
+PULSAR_POS = (20 * AU / SCALE_FACTOR, 3 * AU / SCALE_FACTOR, 25 * AU / SCALE_FACTOR)
+PULSAR_RADIUS = 0.2 * AU / SCALE_FACTOR
+
+
+def planet_layout():
+    """
+    行星的确定性布局（不含随机量），先类地行星后气态行星
+    返回 (轨道半径, 行星半径, 轨道角速度, 是否气态行星) 四个数组
+    """
+    rocky = np.arange(NUM_ROCKY_PLANETS)
+    gas = np.arange(NUM_GAS_PLANETS)
+    orbit_radius = np.concatenate(((0.4 + rocky * 0.3), (5.0 + gas * 4))) * AU / SCALE_FACTOR
+    radius = np.concatenate(((0.03 + rocky * 0.01), (0.11 + gas * 0.03))) * AU / SCALE_FACTOR
+    is_gas = np.concatenate((np.zeros(NUM_ROCKY_PLANETS, dtype=bool), np.ones(NUM_GAS_PLANETS, dtype=bool)))
+    # 轨道速度通过开普勒定律计算
+    orbit_speed = np.sqrt(SUN_MASS * G / (orbit_radius * SCALE_FACTOR * np.where(is_gas, 2.0, 1.5)))
+    return orbit_radius, radius, orbit_speed, is_gas
+
+
+def _layout_key():
+    """布局参数的摘要，布局变化时场景文件自动失效"""
+    layout = (SCENE_VERSION, SKY_RADIUS, NUM_STARS, STAR_RADIUS, NUM_CORONA_PARTICLES,
+              NUM_ROCKY_PLANETS, NUM_GAS_PLANETS, ASTEROID_INNER_RADIUS, ASTEROID_OUTER_RADIUS,
+              NUM_ASTEROIDS, NEBULAE, NEBULA_POINTS, BLACK_HOLE_RADIUS, NUM_BLACK_HOLE_PARTICLES)
+    return hashlib.sha1(repr(layout).encode('utf-8')).hexdigest()[:12]
+
+
+def generate_scene(seed, particle_scale=1):
+    """
+    生成整个场景的随机数据，返回 {名称: 数组}，名称形如 "stars.positions"
+    每个子系统使用由 seed 派生的独立随机数流，修改某一部分的数量不会影响其他部分
+    particle_scale 把日冕、小行星和黑洞粒子的数量放大若干倍，用于性能测试
+    """
+    streams = np.random.SeedSequence(seed).spawn(6)
+    data = {'seed': np.array([seed], dtype=np.int64)}
+
+    # 背景星空
+    rng = np.random.default_rng(streams[0])
+    theta = rng.uniform(0, np.pi, NUM_STARS)
+    phi = rng.uniform(0, 2 * np.pi, NUM_STARS)
+    brightness = rng.uniform(0.3, 1.0, NUM_STARS)
+    data['stars.positions'] = SKY_RADIUS * np.column_stack((np.sin(theta) * np.cos(phi),
+                                                            np.sin(theta) * np.sin(phi),
+                                                            np.cos(theta)))
+    data['stars.colors'] = np.column_stack((brightness, brightness,
+                                            brightness * rng.uniform(0.8, 1.0, NUM_STARS)))
+    data['stars.radii'] = rng.uniform(0.01, 0.05, NUM_STARS) * AU / SCALE_FACTOR
+
+    # 日冕粒子的初始状态
+    rng = np.random.default_rng(streams[1])
+    n = NUM_CORONA_PARTICLES * particle_scale
+    data['corona.theta'] = rng.uniform(0, np.pi, n)
+    data['corona.phi'] = rng.uniform(0, 2 * np.pi, n)
+    data['corona.distance'] = rng.uniform(STAR_RADIUS * 1.05, STAR_RADIUS * 1.5, n) - STAR_RADIUS
+    data['corona.speed_theta'] = rng.uniform(-0.01, 0.01, n)
+    data['corona.speed_phi'] = rng.uniform(-0.01, 0.01, n)
+    data['corona.lifetime'] = rng.uniform(50, 200, n)
+    data['corona.opacity'] = rng.uniform(0.3, 0.7, n)
+
+    # 行星：先类地行星，后气态行星
+    rng = np.random.default_rng(streams[2])
+    rocky = np.column_stack((rng.uniform(0.5, 0.8, NUM_ROCKY_PLANETS),
+                             rng.uniform(0.5, 0.7, NUM_ROCKY_PLANETS),
+                             rng.uniform(0.3, 0.6, NUM_ROCKY_PLANETS)))
+    gas = np.column_stack((rng.uniform(0.6, 0.9, NUM_GAS_PLANETS),
+                           rng.uniform(0.6, 0.9, NUM_GAS_PLANETS),
+                           rng.uniform(0.7, 1.0, NUM_GAS_PLANETS)))
+    data['planets.color'] = np.concatenate((rocky, gas))
+    data['planets.orbit_angle'] = rng.uniform(0, 2 * np.pi, NUM_ROCKY_PLANETS + NUM_GAS_PLANETS)
+    data['planets.num_stripes'] = np.concatenate((np.zeros(NUM_ROCKY_PLANETS, dtype=np.int64),
+                                                  rng.integers(3, 8, NUM_GAS_PLANETS)))
+
+    # 小行星带
+    rng = np.random.default_rng(streams[3])
+    n = NUM_ASTEROIDS * particle_scale
+    color_val = rng.uniform(0.6, 0.9, n)
+    data['asteroids.angle'] = rng.uniform(0, 2 * np.pi, n)
+    data['asteroids.distance'] = rng.uniform(ASTEROID_INNER_RADIUS, ASTEROID_OUTER_RADIUS, n)
+    data['asteroids.y_offset'] = rng.uniform(-0.1, 0.1, n) * ASTEROID_INNER_RADIUS
+    data['asteroids.radii'] = rng.uniform(0.01, 0.05, n) * AU / SCALE_FACTOR
+    data['asteroids.colors'] = np.column_stack((color_val, color_val * 0.9, color_val * 0.7))
+
+    # 星云：每团星云有自己的种子，替身缓存也以该种子为键
+    rng = np.random.default_rng(streams[4])
+    nebula_seeds = rng.integers(0, 2**31, len(NEBULAE))
+    data['nebula.seed'] = nebula_seeds
+    for k, (nebula, nebula_seed) in enumerate(zip(NEBULAE, nebula_seeds.tolist())):
+        particles = generate_nebula_particles(nebula['pos'], nebula['size'], nebula['color'], nebula_seed)
+        for name, values in particles.items():
+            data[f'nebula{k}.{name}'] = values
+
+    # 黑洞附近的粒子
+    rng = np.random.default_rng(streams[5])
+    n = NUM_BLACK_HOLE_PARTICLES * particle_scale
+    disk_thickness = BLACK_HOLE_RADIUS * 0.5
+    data['black_hole.distance'] = rng.uniform(BLACK_HOLE_RADIUS * 5, BLACK_HOLE_RADIUS * 15, n)
+    data['black_hole.angle'] = rng.uniform(0, 2 * np.pi, n)
+    data['black_hole.height'] = rng.uniform(-disk_thickness, disk_thickness, n)
+
+    # 浮点数据以float32保存，场景文件更紧凑
+    return {name: values.astype(np.float32) if values.dtype == np.float64 else values
+            for name, values in data.items()}
+
+
+def save_scene(path, data):
+    """以不压缩的方式保存场景，保证每个数组都能被内存映射"""
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    np.savez(path, **data)
+
+
+def load_scene(path):
+    """
+    内存映射 .npz 场景文件，返回 {名称: 只读数组}
+    npz 是 zip 格式，未压缩的成员在文件中连续存放，定位每个 .npy 数据的偏移后即可直接映射
+    """
+    data = {}
+    with zipfile.ZipFile(path) as archive, open(path, 'rb') as f:
+        for info in archive.infolist():
+            name = info.filename[:-len('.npy')]
+            if info.compress_type != zipfile.ZIP_STORED:
+                with archive.open(info) as member:
+                    data[name] = np.lib.format.read_array(member)
+                continue
+
+            # 跳过zip本地文件头（30字节固定部分 + 文件名 + 扩展字段）
+            f.seek(info.header_offset + 26)
+            name_length, extra_length = struct.unpack('<HH', f.read(4))
+            f.seek(info.header_offset + 30 + name_length + extra_length)
+
+            version = np.lib.format.read_magic(f)
+            if version == (1, 0):
+                shape, fortran_order, dtype = np.lib.format.read_array_header_1_0(f)
+            else:
+                shape, fortran_order, dtype = np.lib.format.read_array_header_2_0(f)
+
+            if int(np.prod(shape)) == 0:
+                data[name] = np.empty(shape, dtype=dtype)
+            else:
+                data[name] = np.memmap(path, dtype=dtype, mode='r', offset=f.tell(), shape=shape,
+                                       order='F' if fortran_order else 'C')
+    return data
+
+
+def scene_path(seed, cache_dir, particle_scale=1):
+    """场景文件路径，由种子、粒子倍数和布局摘要决定"""
+    suffix = f"_x{particle_scale}" if particle_scale != 1 else ""
+    return os.path.join(cache_dir, f"scene_{seed}{suffix}_{_layout_key()}.npz")
+
+
+def load_or_generate_scene(seed, cache_dir, particle_scale=1):
+    """有缓存时直接内存映射场景文件，否则生成并保存后再映射"""
+    path = scene_path(seed, cache_dir, particle_scale)
+    if not os.path.isfile(path):
+        save_scene(path, generate_scene(seed, particle_scale))
+    return load_scene(path)
+
+
+def scene_group(data, prefix):
+    """取出某个子系统的数组，去掉名称前缀"""
+    start = prefix + '.'
+    return {name[len(start):]: values for name, values in data.items() if name.startswith(start)}
@@ -0,0 +1,455 @@
+"""
+宇宙场景模拟核心 - Cosmic Simulation
+场景中所有会运动的状态（日冕粒子、行星、小行星带、黑洞吸积盘与粒子、脉冲星）都保存在NumPy数组中，
+通过 step(dt) 推进；渲染器只读取这些数组，不参与计算
+纯NumPy实现，不依赖vpython，可以在服务器上无界面运行和测试
+
+无界面运行：python cosmic_simulation.py --frames 600
+"""
+
+import argparse
+import time
+import numpy as np
+from cosmic_physics import NBodySystem, circular_velocity, make_barnes_hut_solver, SUN_MASS, G, SCALE_FACTOR
+from cosmic_profiler import FrameProfiler
+from cosmic_trig import make_sincos, numpy_sincos
+from cosmic_scene import (load_or_generate_scene, scene_group, planet_layout, STAR_RADIUS,
+                          BLACK_HOLE_POS, BLACK_HOLE_MASS, BLACK_HOLE_RADIUS)
+
+SIMULATION_RATE = 30  # 参考帧率：各运动量的速度按每 1/30 秒一帧定义
+PHYSICS_MODE = "nbody"  # "nbody"：N体引力积分；"kinematic"：匀速圆周运动
+PHYSICS_TIME_STEP = 86400.0  # 每个参考帧推进的物理时间（秒）
+PHYSICS_SUBSTEPS = 4  # 每帧的积分子步数
+GRAVITY_SOLVER = "direct"  # "direct"：直接求和；"barnes_hut"：八叉树近似（引力源很多时更快）
+BARNES_HUT_THETA = 0.5  # Barnes-Hut张角，越小越精确
+ROCKY_PLANET_MASS = 5.97e24  # 类地行星质量(kg)
+GAS_PLANET_MASS = 1.898e27  # 气态行星质量(kg)
+BLACK_HOLE_GRAVITY = False  # 黑洞是否参与N体引力（场景中黑洞离恒星系较近，开启后外侧行星会在数年模拟时间内被甩出）
+NUM_ACCRETION_RINGS = 20  # 吸积盘圆环数量
+PULSAR_ROTATION_SPEED = 0.1  # 脉冲星光束旋转速度（弧度/帧）
+PULSAR_PULSE_PERIOD = 30  # 脉冲周期（帧数）
+TICK_RATE = 30  # 固定步长模拟的频率（次/秒），与渲染帧率无关
+MAX_TICKS_PER_FRAME = 4  # 每个渲染帧最多执行的模拟步数
+TICK_OVERRUN_POLICY = "merge"  # 超出步数上限时："merge" 把多步合并为更大的步长；"drop" 丢弃多出的时间
+MAX_FRAME_TIME = 0.25  # 单帧最多累计的时间（秒），超出部分（如窗口拖动造成的停顿）直接丢弃
+FRAME_BUDGET = 0.02  # 每帧留给模拟的时间预算（秒），按最近的单步耗时换算出本帧可执行的步数
+TRIG_LOOKUP_SIZE = 0  # 轨道/日冕/黑洞粒子的sin/cos查找表长度，0 表示直接用 np.sin/np.cos（精度与速度见 cosmic_trig --check/--bench）
+TRIG_INTERPOLATE = False  # 查找表是否线性插值（更精确但比直接查表慢）
+# 除日冕粒子外，可以按范围独立推进的粒子数组属性
+PARTICLE_ATTRIBUTES = ('corona_positions', 'asteroid_angle', 'asteroid_distance', 'asteroid_y_offset',
+                       'asteroid_speed', 'asteroid_positions', 'bh_distance', 'bh_angle', 'bh_height',
+                       'bh_speed', 'bh_positions')
+
+
+def spherical_to_cartesian(center, r, theta, phi, sincos=numpy_sincos):
+    """球坐标批量转直角坐标"""
+    sin_theta, cos_theta = sincos(theta)
+    sin_phi, cos_phi = sincos(phi)
+    return np.asarray(center) + r[:, np.newaxis] * np.column_stack((sin_theta * cos_phi,
+                                                                     sin_theta * sin_phi,
+                                                                     cos_theta))
+
+
+def orbit_positions(out, center, distance, angle, height, sincos=numpy_sincos):
+    """水平圆轨道上的位置：x = r·cosθ, y = height, z = r·sinθ"""
+    sin, cos = sincos(angle)
+    out[:, 0] = distance * cos
+    out[:, 1] = height
+    out[:, 2] = distance * sin
+    out += center
+    return out
+
+
+# 以下 advance_* 函数只修改传入的数组，可以作用于整体数组，也可以作用于其中一段切片视图（并行模式下每个进程推进一段）
+# sincos 为 cosmic_trig.make_sincos 返回的函数，默认直接用 np.sin/np.cos
+def advance_corona(c, positions, center, star_radius, frames, rng, sincos=numpy_sincos):
+    """日冕粒子沿球面漂移，寿命结束的粒子原地重生，返回重生的粒子数"""
+    c['age'] += frames
+    c['theta'] += c['speed_theta'] * frames
+    c['phi'] += c['speed_phi'] * frames
+
+    expired = np.flatnonzero(c['age'] >= c['lifetime'])
+    n = len(expired)
+    if n:
+        c['theta'][expired] = rng.uniform(0, np.pi, n)
+        c['phi'][expired] = rng.uniform(0, 2 * np.pi, n)
+        c['distance'][expired] = rng.uniform(star_radius * 1.05, star_radius * 1.5, n) - star_radius
+        c['speed_theta'][expired] = rng.uniform(-0.01, 0.01, n)
+        c['speed_phi'][expired] = rng.uniform(-0.01, 0.01, n)
+        c['lifetime'][expired] = rng.uniform(50, 200, n)
+        c['opacity'][expired] = rng.uniform(0.3, 0.7, n)
+        c['age'][expired] = 0.0
+        c['generation'][expired] += 1
+
+    positions[:] = spherical_to_cartesian(center, star_radius + c['distance'], c['theta'], c['phi'], sincos)
+    return n
+
+
+def advance_orbits(positions, center, distance, angle, height, speed, frames, sincos=numpy_sincos):
+    """沿水平圆轨道匀速推进"""
+    angle += speed * frames
+    orbit_positions(positions, center, distance, angle, height, sincos)
+
+
+def advance_accretion(positions, center, radius, distance, angle, height, speed, frames, rng,
+                      sincos=numpy_sincos):
+    """粒子绕黑洞旋转并逐渐被吸入，太接近时在外围重新生成"""
+    angle += speed * frames
+    distance -= speed * 10 * frames  # 逐渐向黑洞移动
+
+    captured = np.flatnonzero(distance < radius * 1.5)
+    n = len(captured)
+    if n:
+        distance[captured] = rng.uniform(radius * 5, radius * 15, n)
+        angle[captured] = rng.uniform(0, 2 * np.pi, n)
+        height[captured] = rng.uniform(-radius, radius, n) * 0.5
+
+    orbit_positions(positions, center, distance, angle, height, sincos)
+
+
+class CosmicSimulation:
+    """
+    宇宙场景的模拟状态
+    scene_data 为 cosmic_scene 生成（或内存映射）的场景数组，会被修改的数组在这里复制一份；
+    seed 用于运行时重新生成粒子的随机数流；profiler 可选，用于按子系统计时；
+    trig_table_size 为粒子位置计算使用的sin/cos查找表长度（0 为不使用查找表）
+    """
+
+    def __init__(self, scene_data, seed=0, physics_mode=PHYSICS_MODE, gravity_solver=GRAVITY_SOLVER,
+                 profiler=None, trig_table_size=TRIG_LOOKUP_SIZE):
+        self.rng = np.random.default_rng(seed)
+        self.profiler = profiler or FrameProfiler(enabled=False)
+        self.sincos = make_sincos(trig_table_size, TRIG_INTERPOLATE)
+        self.frame = 0
+        self.time = 0.0  # 累计推进的时间（秒）
+
+        # 中央恒星与日冕粒子
+        self.star_pos = np.zeros(3)
+        self.star_radius = STAR_RADIUS
+        corona = scene_group(scene_data, 'corona')
+        self.corona = {name: np.array(values, dtype=float) for name, values in corona.items()}
+        self.corona['age'] = np.zeros(len(self.corona['theta']))
+        self.corona['generation'] = np.zeros(len(self.corona['theta']), dtype=np.int64)  # 每次重生加一
+        self.corona_recycled = 0
+        self.corona_positions = np.empty((len(self.corona['theta']), 3))
+
+        # 行星
+        planets = scene_group(scene_data, 'planets')
+        self.planet_orbit_radius, self.planet_radius, self.planet_orbit_speed, self.planet_is_gas = planet_layout()
+        self.planet_orbit_angle = np.array(planets['orbit_angle'], dtype=float)
+        self.planet_positions = np.empty((len(self.planet_orbit_angle), 3))
+
+        # 小行星带
+        asteroids = scene_group(scene_data, 'asteroids')
+        self.asteroid_angle = np.array(asteroids['angle'], dtype=float)
+        self.asteroid_distance = np.asarray(asteroids['distance'], dtype=float)
+        self.asteroid_y_offset = np.asarray(asteroids['y_offset'], dtype=float)
+        self.asteroid_speed = np.sqrt(G * SUN_MASS / (self.asteroid_distance * SCALE_FACTOR)) * 0.7  # 轨道速度简化计算
+        self.asteroid_positions = np.empty((len(self.asteroid_angle), 3))
+
+        # 黑洞吸积盘与附近的粒子
+        self.black_hole_pos = np.array(BLACK_HOLE_POS, dtype=float)
+        self.black_hole_radius = BLACK_HOLE_RADIUS
+        self.black_hole_mass = BLACK_HOLE_MASS
+        i = np.arange(NUM_ACCRETION_RINGS)
+        disk_radius = BLACK_HOLE_RADIUS * 5
+        self.ring_radius = BLACK_HOLE_RADIUS * 2 + (disk_radius - BLACK_HOLE_RADIUS * 2) * i / NUM_ACCRETION_RINGS
+        self.ring_speed = np.sqrt(G * BLACK_HOLE_MASS / (self.ring_radius * SCALE_FACTOR)) * 0.01
+        self.ring_angle = np.zeros(NUM_ACCRETION_RINGS)
+        black_hole = scene_group(scene_data, 'black_hole')
+        self.bh_distance = np.array(black_hole['distance'], dtype=float)
+        self.bh_angle = np.array(black_hole['angle'], dtype=float)
+        self.bh_height = np.array(black_hole['height'], dtype=float)
+        self.bh_speed = np.sqrt(G * BLACK_HOLE_MASS / (self.bh_distance * SCALE_FACTOR)) * 0.05
+        self.bh_positions = np.empty((len(self.bh_distance), 3))
+
+        # 脉冲星
+        self.pulsar_angle = 0.0
+        self.pulsar_timer = 0.0
+        self.pulsar_brightness = None  # 最近一次脉冲的亮度，尚未脉冲时为 None
+
+        self.compute_positions()
+        self.physics = self._create_physics(gravity_solver) if physics_mode == "nbody" else None
+        self.parallel = None  # 并行推进器，由 cosmic_parallel.ParallelStepper 设置
+
+    @property
+    def body_count(self):
+        """每步推进的运动体数量"""
+        return (len(self.corona_positions) + len(self.planet_positions) + len(self.asteroid_positions)
+                + len(self.bh_positions) + len(self.ring_angle))
+
+    def _create_physics(self, gravity_solver):
+        """用恒星、行星、黑洞和小行星带建立N体系统，恒星和黑洞固定不动"""
+        solver = make_barnes_hut_solver(BARNES_HUT_THETA) if gravity_solver == "barnes_hut" else None
+        physics = NBodySystem(force_solver=solver)
+        center = self.star_pos
+        physics.add_bodies(center, 0.0, SUN_MASS, fixed=True)
+        if BLACK_HOLE_GRAVITY:
+            physics.add_bodies(self.black_hole_pos, 0.0, self.black_hole_mass, fixed=True)
+
+        # 行星从当前轨道角度出发，初速度为圆轨道速度
+        masses = np.where(self.planet_is_gas, GAS_PLANET_MASS, ROCKY_PLANET_MASS)
+        planet_slice = physics.add_bodies(self.planet_positions,
+                                          circular_velocity(self.planet_positions, center, SUN_MASS), masses)
+        # 小行星质量可以忽略，作为只受力的测试粒子
+        asteroid_slice = physics.add_bodies(self.asteroid_positions,
+                                            circular_velocity(self.asteroid_positions, center, SUN_MASS), 0.0)
+        return {'system': physics, 'planets': planet_slice, 'asteroids': asteroid_slice}
+
+    def compute_positions(self):
+        """由轨道参数计算日冕粒子、行星、小行星和黑洞粒子的位置"""
+        c = self.corona
+        self.corona_positions[:] = spherical_to_cartesian(self.star_pos, self.star_radius + c['distance'],
+                                                          c['theta'], c['phi'], self.sincos)
+        orbit_positions(self.planet_positions, self.star_pos, self.planet_orbit_radius,
+                        self.planet_orbit_angle, 0.0, self.sincos)
+        orbit_positions(self.asteroid_positions, self.star_pos, self.asteroid_distance,
+                        self.asteroid_angle, self.asteroid_y_offset, self.sincos)
+        orbit_positions(self.bh_positions, self.black_hole_pos, self.bh_distance,
+                        self.bh_angle, self.bh_height, self.sincos)
+
+    def particle_arrays(self):
+        """可以按范围独立推进的粒子数组，并行模式下放入共享内存"""
+        arrays = {f'corona.{name}': values for name, values in self.corona.items()}
+        for name in PARTICLE_ATTRIBUTES:
+            arrays[name] = getattr(self, name)
+        return arrays
+
+    def bind_particle_arrays(self, arrays):
+        """用另一组同名数组（如共享内存视图）替换粒子数组"""
+        for name, values in arrays.items():
+            if name.startswith('corona.'):
+                self.corona[name[len('corona.'):]] = values
+            else:
+                setattr(self, name, values)
+
+    def step(self, dt):
+        """推进 dt 秒（按 SIMULATION_RATE 换算成参考帧数）"""
+        frames = dt * SIMULATION_RATE
+        profiler = self.profiler
+        parallel = self.parallel
+        if parallel is not None:
+            # 粒子子系统交给工作进程，主进程同时推进行星、吸积盘和脉冲星
+            parallel.begin(frames)
+        else:
+            with profiler.section('update_star'):
+                self.step_corona(frames)
+        if self.physics is not None:
+            with profiler.section('update_physics'):
+                self.step_physics(frames)
+        else:
+            with profiler.section('update_planets'):
+                advance_orbits(self.planet_positions, self.star_pos, self.planet_orbit_radius,
+                               self.planet_orbit_angle, 0.0, self.planet_orbit_speed, frames, self.sincos)
+            if parallel is None:
+                with profiler.section('update_asteroids'):
+                    advance_orbits(self.asteroid_positions, self.star_pos, self.asteroid_distance,
+                                   self.asteroid_angle, self.asteroid_y_offset, self.asteroid_speed, frames,
+                                   self.sincos)
+        with profiler.section('update_black_hole'):
+            self.ring_angle += self.ring_speed * frames
+            if parallel is None:
+                self.step_black_hole(frames)
+        with profiler.section('update_pulsar'):
+            self.step_pulsar(frames)
+        if parallel is not None:
+            with profiler.section('parallel_wait'):
+                self.corona_recycled += parallel.finish()
+        self.frame += 1
+        self.time += dt
+
+    def step_corona(self, frames):
+        """推进全部日冕粒子"""
+        self.corona_recycled += advance_corona(self.corona, self.corona_positions, self.star_pos,
+                                               self.star_radius, frames, self.rng, self.sincos)
+
+    def step_physics(self, frames):
+        """N体积分，并把行星和小行星的位置同步到状态数组"""
+        system = self.physics['system']
+        system.step(PHYSICS_TIME_STEP * frames, PHYSICS_SUBSTEPS)
+        self.planet_positions[:] = system.positions[self.physics['planets']]
+        self.asteroid_positions[:] = system.positions[self.physics['asteroids']]
+
+    def step_black_hole(self, frames):
+        """推进全部黑洞粒子"""
+        advance_accretion(self.bh_positions, self.black_hole_pos, self.black_hole_radius, self.bh_distance,
+                          self.bh_angle, self.bh_height, self.bh_speed, frames, self.rng, self.sincos)
+
+    def step_pulsar(self, frames):
+        """光束旋转；每个脉冲周期更新一次亮度"""
+        self.pulsar_angle += PULSAR_ROTATION_SPEED * frames
+        self.pulsar_timer += frames
+        if self.pulsar_timer >= PULSAR_PULSE_PERIOD:
+            self.pulsar_timer = 0.0
+            self.pulsar_brightness = 0.5 + 0.5 * np.sin(self.pulsar_timer / PULSAR_PULSE_PERIOD * np.pi)
+
+    def stats(self):
+        """当前状态的计数信息"""
+        return {
+            'frame': self.frame,
+            'time': self.time,
+            'bodies': self.body_count,
+            'corona_recycled': self.corona_recycled,
+            'physics_time': self.physics['system'].time if self.physics is not None else 0.0
+        }
+
+
+class FixedStepClock:
+    """
+    固定步长累加器：把真实经过的时间累计起来，按 1/tick_rate 的固定步长切分成模拟步
+    本帧可执行的步数受 max_ticks 和时间预算限制，超出时按 policy 合并或丢弃；
+    剩余不足一步的时间比例 alpha 用于渲染插值
+    """
+
+    def __init__(self, tick_rate=TICK_RATE, max_ticks=MAX_TICKS_PER_FRAME, policy=TICK_OVERRUN_POLICY,
+                 max_frame_time=MAX_FRAME_TIME, budget=FRAME_BUDGET):
+        self.tick_dt = 1.0 / tick_rate
+        self.max_ticks = max_ticks
+        self.policy = policy
+        self.max_frame_time = max_frame_time
+        self.budget = budget
+        self.accumulator = 0.0
+        self.tick_cost = 0.0  # 单步耗时的指数滑动平均（秒）
+        self.ticks = 0  # 累计应执行的步数
+        self.steps = 0  # 累计实际调用 step 的次数
+        self.dropped = 0  # 累计丢弃的步数
+        self.merged = 0  # 累计被合并进其他步的步数
+
+    @property
+    def alpha(self):
+        """上一步到下一步之间的插值比例 [0, 1)"""
+        return self.accumulator / self.tick_dt
+
+    def tick_limit(self):
+        """本帧最多执行的步数：不超过 max_ticks，且按单步耗时估计不超出时间预算"""
+        if self.tick_cost <= 0:
+            return self.max_ticks
+        return max(1, min(self.max_ticks, int(self.budget / self.tick_cost)))
+
+    def advance(self, elapsed):
+        """累计经过的时间，返回本帧要执行的各步步长列表"""
+        if elapsed > self.max_frame_time:
+            self.dropped += int((elapsed - self.max_frame_time) / self.tick_dt)
+            elapsed = self.max_frame_time
+        self.accumulator += elapsed
+        ticks = int(self.accumulator / self.tick_dt)
+        self.accumulator -= ticks * self.tick_dt
+        self.ticks += ticks
+
+        limit = self.tick_limit()
+        if ticks <= limit:
+            steps = [self.tick_dt] * ticks
+        elif self.policy == "merge":
+            # 多出的步平均合并到 limit 步中，模拟速度保持与真实时间一致，单步精度降低
+            per_step, extra = divmod(ticks, limit)
+            steps = [(per_step + 1) * self.tick_dt] * extra + [per_step * self.tick_dt] * (limit - extra)
+            self.merged += ticks - limit
+        else:
+            # 多出的时间直接丢弃，模拟相对真实时间变慢
+            steps = [self.tick_dt] * limit
+            self.dropped += ticks - limit
+        self.steps += len(steps)
+        return steps
+
+    def record(self, elapsed, steps):
+        """记录本帧执行 steps 步的实际耗时，用于估计单步耗时"""
+        if steps:
+            cost = elapsed / steps
+            self.tick_cost = cost if self.tick_cost <= 0 else 0.9 * self.tick_cost + 0.1 * cost
+
+    def reset(self):
+        """丢弃累计的时间（暂停后恢复时使用）"""
+        self.accumulator = 0.0
+
+    def stats(self):
+        return {
+            'ticks': self.ticks,
+            'steps': self.steps,
+            'dropped': self.dropped,
+            'merged': self.merged,
+            'tick_cost_ms': self.tick_cost * 1000.0,
+            'tick_limit': self.tick_limit()
+        }
+
+
+class InterpolatedState:
+    """
+    渲染用的插值状态：在每个模拟步之前调用 capture() 记录上一步的状态，
+    update(alpha) 把位置和旋转角度插值到上一步与当前步之间；其余属性直接读取模拟状态
+    重生的日冕粒子和被吸入后重新生成的黑洞粒子不做插值，避免在新旧位置之间拉出轨迹
+    """
+
+    INTERPOLATED = ('corona_positions', 'planet_positions', 'asteroid_positions', 'bh_positions', 'ring_angle')
+
+    def __init__(self, sim):
+        self.sim = sim
+        self.previous = {}
+        for name in self.INTERPOLATED:
+            current = getattr(sim, name)
+            setattr(self, name, current.copy())
+            self.previous[name] = current.copy()
+        self.previous_generation = sim.corona['generation'].copy()
+        self.previous_bh_distance = sim.bh_distance.copy()
+        self.previous_pulsar_angle = self.pulsar_angle = sim.pulsar_angle
+
+    def __getattr__(self, name):
+        return getattr(self.sim, name)
+
+    def capture(self):
+        sim = self.sim
+        for name in self.INTERPOLATED:
+            self.previous[name][...] = getattr(sim, name)
+        self.previous_generation[:] = sim.corona['generation']
+        self.previous_bh_distance[:] = sim.bh_distance
+        self.previous_pulsar_angle = sim.pulsar_angle
+
+    def update(self, alpha):
+        sim = self.sim
+        for name in self.INTERPOLATED:
+            out, previous = getattr(self, name), self.previous[name]
+            np.subtract(getattr(sim, name), previous, out=out)
+            out *= alpha
+            out += previous
+        self.pulsar_angle = self.previous_pulsar_angle + (sim.pulsar_angle - self.previous_pulsar_angle) * alpha
+
+        # 粒子向黑洞下落时距离只会减小，距离增大说明粒子被重新生成
+        respawned = np.flatnonzero(sim.corona['generation'] != self.previous_generation)
+        self.corona_positions[respawned] = sim.corona_positions[respawned]
+        captured = np.flatnonzero(sim.bh_distance > self.previous_bh_distance)
+        self.bh_positions[captured] = sim.bh_positions[captured]
+
+
+def run_headless(frames=600, seed=2024, physics_mode=PHYSICS_MODE, gravity_solver=GRAVITY_SOLVER,
+                 cache_dir="scene_cache", profile=False, trig_table_size=TRIG_LOOKUP_SIZE):
+    """无界面推进 frames 帧，输出吞吐量（运动体·步/秒）"""
+    scene_data = load_or_generate_scene(seed, cache_dir)
+    profiler = FrameProfiler(enabled=profile)
+    sim = CosmicSimulation(scene_data, seed, physics_mode, gravity_solver, profiler, trig_table_size)
+    dt = 1.0 / SIMULATION_RATE
+
+    start = time.perf_counter()
+    for _ in range(frames):
+        profiler.begin_frame()
+        sim.step(dt)
+        profiler.end_frame()
+    elapsed = time.perf_counter() - start
+
+    throughput = sim.body_count * frames / elapsed
+    print(f"{sim.body_count} 个运动体, {frames} 帧, 用时 {elapsed:.3f} 秒 ({frames / elapsed:.1f} 帧/秒)")
+    print(f"吞吐量 {throughput:,.0f} 运动体·步/秒")
+    if profile:
+        print(profiler.overlay_text())
+    return throughput
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="无界面宇宙场景模拟")
+    parser.add_argument("--frames", type=int, default=600, help="推进的帧数")
+    parser.add_argument("--seed", type=int, default=2024, help="场景随机种子")
+    parser.add_argument("--physics", choices=("nbody", "kinematic"), default=PHYSICS_MODE, help="运动模式")
+    parser.add_argument("--solver", choices=("direct", "barnes_hut"), default=GRAVITY_SOLVER, help="引力求解器")
+    parser.add_argument("--cache-dir", default="scene_cache", help="场景文件缓存目录")
+    parser.add_argument("--profile", action="store_true", help="输出各子系统的耗时百分位")
+    parser.add_argument("--trig", type=int, default=TRIG_LOOKUP_SIZE, help="sin/cos查找表长度，0为不使用")
+    args = parser.parse_args()
+    run_headless(args.frames, args.seed, args.physics, args.solver, args.cache_dir, args.profile, args.trig)
@@ -0,0 +1,172 @@
+"""
+三角函数查找表 - Cosmic Trig
+把 [0, 2π) 按固定分辨率量化，sin/cos 通过查表（可选线性插值）计算，
+同时支持Python标量和NumPy数组输入，并给出与分辨率对应的误差上界
+cosmic_simulation 中的轨道、日冕和黑洞粒子更新共用同一个 sincos 函数，可以在两种实现之间切换
+
+精度检查：python cosmic_trig.py --check
+速度对比：python cosmic_trig.py --bench
+"""
+
+import argparse
+import math
+import time
+import numpy as np
+
+TRIG_TABLE_SIZE = 4096  # 默认表长（一个周期内的采样点数，必须是4的倍数）
+TWO_PI = 2.0 * math.pi
+
+
+def numpy_sincos(angle):
+    """直接调用 np.sin/np.cos，作为默认实现"""
+    return np.sin(angle), np.cos(angle)
+
+
+class TrigTable:
+    """
+    sin/cos 查找表
+    interpolate 为 True 时在相邻采样点之间线性插值，误差上界为 step²/8；
+    否则取最近的采样点，误差上界为 step/2（step = 2π/size）
+    """
+
+    def __init__(self, size=TRIG_TABLE_SIZE, interpolate=True):
+        if size <= 0 or size % 4:
+            raise ValueError(f"表长必须是4的正整数倍: {size}")
+        self.size = size
+        self.interpolate = interpolate
+        self.step = TWO_PI / size
+        self.scale = size / TWO_PI
+        self.quarter = size // 4
+        # 多存四分之一周期加一个点，cos 直接偏移下标，插值时不需要回绕
+        self.table = np.sin(np.arange(size + self.quarter + 1) * self.step)
+        self._values = self.table.tolist()
+
+    @property
+    def error_bound(self):
+        """与 math.sin/cos 的最大绝对误差上界"""
+        if self.interpolate:
+            return self.step * self.step / 8.0
+        return self.step / 2.0
+
+    def _lookup_scalar(self, angle, offset):
+        t = angle * self.scale
+        if not self.interpolate:
+            return self._values[int(math.floor(t + 0.5)) % self.size + offset]
+        i = math.floor(t)
+        frac = t - i
+        i = int(i) % self.size + offset
+        low = self._values[i]
+        return low + (self._values[i + 1] - low) * frac
+
+    def _lookup_array(self, angle, offsets):
+        t = np.multiply(angle, self.scale)
+        if not self.interpolate:
+            i = np.rint(t).astype(np.int64) % self.size
+            return [self.table[i + offset] for offset in offsets]
+        base = np.floor(t)
+        frac = t - base
+        i = base.astype(np.int64) % self.size
+        results = []
+        for offset in offsets:
+            low = self.table[i + offset]
+            results.append(low + (self.table[i + offset + 1] - low) * frac)
+        return results
+
+    def sin(self, angle):
+        if isinstance(angle, (int, float)):
+            return self._lookup_scalar(angle, 0)
+        return self._lookup_array(angle, (0,))[0]
+
+    def cos(self, angle):
+        if isinstance(angle, (int, float)):
+            return self._lookup_scalar(angle, self.quarter)
+        return self._lookup_array(angle, (self.quarter,))[0]
+
+    def sincos(self, angle):
+        """同时计算 sin 和 cos，数组输入时只计算一次下标"""
+        if isinstance(angle, (int, float)):
+            return self._lookup_scalar(angle, 0), self._lookup_scalar(angle, self.quarter)
+        sin, cos = self._lookup_array(angle, (0, self.quarter))
+        return sin, cos
+
+
+def make_sincos(table_size, interpolate=True):
+    """table_size 为 0 时返回 numpy_sincos，否则返回对应分辨率查找表的 sincos"""
+    if not table_size:
+        return numpy_sincos
+    return TrigTable(table_size, interpolate).sincos
+
+
+def check_precision(sizes=(256, 1024, 4096, 16384, 65536), samples=200000, seed=0):
+    """对比 math.sin/cos，输出每种表长的实测最大误差和理论上界"""
+    rng = np.random.default_rng(seed)
+    # 覆盖负角度和多个周期，与轨道角度持续累加的情况一致
+    angles = rng.uniform(-50 * math.pi, 50 * math.pi, samples)
+    exact_sin = np.array([math.sin(a) for a in angles.tolist()])
+    exact_cos = np.array([math.cos(a) for a in angles.tolist()])
+
+    print(f"{'表长':>8} {'插值':>4} {'实测最大误差':>14} {'误差上界':>12} {'标量一致':>8}")
+    ok = True
+    for size in sizes:
+        for interpolate in (False, True):
+            table = TrigTable(size, interpolate)
+            sin, cos = table.sincos(angles)
+            error = max(np.abs(sin - exact_sin).max(), np.abs(cos - exact_cos).max())
+            # 标量路径与数组路径结果一致
+            scalar = all(table.sin(a) == s for a, s in zip(angles[:1000].tolist(), sin[:1000].tolist()))
+            within = error <= table.error_bound * (1 + 1e-9) + 1e-15
+            ok &= within and scalar
+            print(f"{size:>8} {'是' if interpolate else '否':>4} {error:>14.3e} {table.error_bound:>12.3e} "
+                  f"{'是' if scalar else '否':>8}")
+    print("全部误差都在上界以内" if ok else "存在超出上界或标量/数组不一致的情况")
+    return ok
+
+
+def _best_time(func, repeat=5):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def benchmark(sizes=(1024, 4096, 65536), array_length=100000, scalar_calls=200000, seed=0):
+    """对比查找表与 math / numpy 在标量和数组输入下的耗时"""
+    rng = np.random.default_rng(seed)
+    angles = rng.uniform(0, 1000, array_length)
+    scalars = angles[:scalar_calls].tolist() * (scalar_calls // min(array_length, scalar_calls))
+
+    def math_scalar():
+        for a in scalars:
+            math.sin(a), math.cos(a)
+    base_scalar = _best_time(math_scalar)
+    base_array = _best_time(lambda: numpy_sincos(angles))
+    print(f"标量 {len(scalars)} 次 sin+cos，数组长度 {array_length}")
+    print(f"{'实现':<22} {'标量(ns/次)':>12} {'加速比':>8} {'数组(ns/元素)':>14} {'加速比':>8}")
+    print(f"{'math / numpy':<22} {base_scalar / len(scalars) * 1e9:>12.1f} {1.0:>8.2f} "
+          f"{base_array / array_length * 1e9:>14.2f} {1.0:>8.2f}")
+
+    for size in sizes:
+        for interpolate in (False, True):
+            table = TrigTable(size, interpolate)
+
+            def table_scalar():
+                for a in scalars:
+                    table.sincos(a)
+            t_scalar = _best_time(table_scalar)
+            t_array = _best_time(lambda: table.sincos(angles))
+            name = f"表长 {size}{' 插值' if interpolate else ''}"
+            print(f"{name:<22} {t_scalar / len(scalars) * 1e9:>12.1f} {base_scalar / t_scalar:>8.2f} "
+                  f"{t_array / array_length * 1e9:>14.2f} {base_array / t_array:>8.2f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="三角函数查找表的精度检查和速度对比")
+    parser.add_argument("--check", action="store_true", help="与math对比精度")
+    parser.add_argument("--bench", action="store_true", help="与math/numpy对比速度")
+    args = parser.parse_args()
+    if args.check or not args.bench:
+        check_precision()
+    if args.bench:
+        benchmark()
@@ -0,0 +1,126 @@
+"""
+宇宙场景可见性管理 - Cosmic Visibility
+按摄像机距离和视锥批量计算每个对象的细节层次(LOD)与可见性，
+只在状态发生变化时回调，避免每帧重复设置场景对象的 visible 属性
+纯NumPy实现，不依赖vpython
+"""
+
+import math
+import numpy as np
+
+
+class Camera:
+    """摄像机参数：位置、朝向、上方向、视场角（弧度）和宽高比"""
+
+    def __init__(self, pos, forward, up=(0, 1, 0), fov=math.pi / 3, aspect=1.0):
+        self.pos = np.asarray(pos, dtype=float)
+        forward = np.asarray(forward, dtype=float)
+        self.forward = forward / np.linalg.norm(forward)
+        self.up = np.asarray(up, dtype=float)
+        self.fov = fov
+        self.aspect = aspect
+
+    def cone_half_angle(self):
+        """包住整个视锥体的圆锥半角（按视野对角线计算）"""
+        tan_half = math.tan(self.fov / 2)
+        return math.atan(tan_half * math.sqrt(1 + max(self.aspect, 1 / self.aspect) ** 2))
+
+
+class VisibilityGroup:
+    """
+    一组同类对象的可见性状态
+    lod_distances 为递增的距离阈值，距离超过第 k 个阈值时细节层次为 k+1；
+    超出 max_distance 或位于视锥之外的对象被剔除
+    hysteresis 为阈值两侧的缓冲比例，防止对象在阈值附近来回切换
+    on_change(indices, visible, level) 只在有对象状态变化时调用，参数只包含变化的对象
+    """
+
+    def __init__(self, name, positions, radii=0.0, lod_distances=(), max_distance=None,
+                 frustum_cull=True, hysteresis=0.1, on_change=None):
+        self.name = name
+        self.positions = positions  # (N,3) 数组，动态对象可以原地更新
+        self.radii = np.broadcast_to(np.asarray(radii, dtype=float), (len(positions),))
+        self.lod_distances = np.asarray(lod_distances, dtype=float)
+        self.max_distance = max_distance
+        self.frustum_cull = frustum_cull
+        self.hysteresis = hysteresis
+        self.on_change = on_change
+
+        n = len(positions)
+        self.distance = np.zeros(n)
+        self.level = np.zeros(n, dtype=np.int8)
+        self.visible = np.ones(n, dtype=bool)
+        self.transitions = 0  # 累计状态变化次数
+
+    def update(self, camera, cone_half_angle=None):
+        """根据摄像机更新距离、细节层次和可见性，返回本帧变化的对象数"""
+        if len(self.positions) == 0:
+            return 0
+
+        offset = self.positions - camera.pos
+        distance = np.sqrt(np.einsum('ij,ij->i', offset, offset), out=self.distance)
+        margin = self.hysteresis
+
+        # 细节层次：远离时要超过放大后的阈值才降级，靠近时要低于缩小后的阈值才升级
+        level = self.level
+        if len(self.lod_distances):
+            far_level = np.searchsorted(self.lod_distances * (1 + margin), distance)
+            near_level = np.searchsorted(self.lod_distances * (1 - margin), distance)
+            level = np.where(far_level > level, far_level,
+                             np.where(near_level < level, near_level, level)).astype(np.int8)
+
+        visible = np.ones(len(distance), dtype=bool)
+        if self.max_distance is not None:
+            limit = np.where(self.visible, self.max_distance * (1 + margin), self.max_distance * (1 - margin))
+            visible &= distance - self.radii <= limit
+        if self.frustum_cull:
+            if cone_half_angle is None:
+                cone_half_angle = camera.cone_half_angle()
+            # 对象包围球与视锥外接圆锥相交即视为可见
+            along = offset @ camera.forward
+            across = np.sqrt(np.maximum(distance * distance - along * along, 0.0))
+            cos_a, sin_a = math.cos(cone_half_angle), math.sin(cone_half_angle)
+            # 到圆锥面的距离；位于圆锥背后时最近点是摄像机本身
+            to_cone = np.where(along * cos_a + across * sin_a < 0, distance,
+                               across * cos_a - along * sin_a)
+            visible &= to_cone <= self.radii
+
+        changed = np.flatnonzero((visible != self.visible) | (level != self.level))
+        self.level = level
+        self.visible = visible
+        if len(changed):
+            self.transitions += len(changed)
+            if self.on_change is not None:
+                self.on_change(changed, visible[changed], level[changed])
+        return len(changed)
+
+    def visible_count(self):
+        return int(np.count_nonzero(self.visible))
+
+
+class VisibilityManager:
+    """管理多个可见性分组，每帧对所有分组做一次批量更新"""
+
+    def __init__(self):
+        self.groups = {}
+
+    def add_group(self, name, positions, **kwargs):
+        group = VisibilityGroup(name, positions, **kwargs)
+        self.groups[name] = group
+        return group
+
+    def update(self, camera):
+        """更新全部分组，返回 {分组名: 本帧变化的对象数}"""
+        cone_half_angle = camera.cone_half_angle()
+        return {name: group.update(camera, cone_half_angle) for name, group in self.groups.items()}
+
+    def stats(self):
+        """每个分组的对象总数、可见数和累计状态变化次数"""
+        return {
+            name: {
+                'total': len(group.positions),
+                'visible': group.visible_count(),
+                'transitions': group.transitions
+            }
+            for name, group in self.groups.items()
+        }
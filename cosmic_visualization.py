@@ -2,134 +2,181 @@
 宇宙场景渲染程序 - Cosmic Visualization
 使用VPython (GlowScript)创建的交互式3D宇宙场景
 包含恒星、行星、星云、黑洞等天体，并模拟基础物理效果
+运动状态由 cosmic_simulation.CosmicSimulation 推进，本文件只负责把状态同步到vpython对象
 """
 
 import vpython as vp
+import atexit
 import math
-import random
+import time
 import numpy as np
 from vpython import vec
+from cosmic_physics import SCALE_FACTOR, AU
+from cosmic_visibility import Camera, VisibilityManager
+from cosmic_nebula import load_or_bake_nebula
+from cosmic_profiler import FrameProfiler
+from cosmic_scene import load_or_generate_scene, scene_group, NEBULAE, PULSAR_POS, PULSAR_RADIUS
+from cosmic_simulation import CosmicSimulation, FixedStepClock, InterpolatedState
+from cosmic_parallel import ParallelStepper
 
 # 全局设置
-SCALE_FACTOR = 1e9  # 比例因子，用于缩放真实天体距离
-G = 6.67430e-11  # 万有引力常数
-AU = 149.6e9  # 天文单位(m)
+SCENE_SEED = 2024  # 场景随机种子，相同种子生成完全相同的场景
+SCENE_CACHE_DIR = "scene_cache"  # 场景文件缓存目录
 MAX_RENDER_DISTANCE = 50 * AU  # 最大渲染距离（50天文单位）
+STRIPE_LOD_DISTANCE = 10 * AU  # 超过该距离时隐藏气态行星条纹
+LOD_HYSTERESIS = 0.1  # LOD和剔除阈值两侧的缓冲比例，避免来回切换
+NEBULA_MODE = "impostor"  # "impostor"：预烘焙的纹理切片；"spheres"：每个粒子一个半透明球体
+NEBULA_CACHE_DIR = "nebula_cache"  # 星云纹理缓存目录（相对工作目录，vpython从工作目录读取纹理）
 RUNNING = True  # 模拟运行状态
+RENDER_RATE = 30  # 渲染帧率上限；模拟频率由 cosmic_simulation.TICK_RATE 单独设置
+PARALLEL_WORKERS = 0  # 推进粒子子系统的工作进程数，0 表示在主进程中推进
+PROFILE_ENABLED = False  # 是否记录每帧各阶段耗时（开启后在屏幕上显示统计）
+PROFILE_TRACE_PATH = "frame_trace.json"  # 逐帧记录的导出路径（.json 或 .csv），退出或按P键时写出
+PROFILE_OVERLAY_INTERVAL = 15  # 叠加统计文本的刷新间隔（帧数）
+
+# 画布和说明文本在 main() 中创建
+scene = None
+instructions = None
+INSTRUCTIONS_TEXT = "控制：WASD移动，鼠标拖动调整视角，空格键暂停/继续"
+profiler = FrameProfiler(enabled=False)
 
 # 场景设置
-scene = vp.canvas(title="宇宙场景渲染", width=1200, height=800, center=vp.vector(0, 0, 0))
-scene.range = 5 * AU / SCALE_FACTOR
-scene.forward = vp.vec(0, -1, -2)
-scene.fov = math.pi/6
-scene.background = vp.color.black
-
-# 增加说明文本
-instructions = vp.label(pos=vp.vec(0, 0, 0), 
-                       text="控制：WASD移动，鼠标拖动调整视角，空格键暂停/继续",
-                       xoffset=0, yoffset=-scene.height/2 + 30, 
-                       color=vp.color.white,
-                       height=15,
-                       box=False)
+def create_canvas():
+    """创建画布和说明文本"""
+    global scene, instructions
+    scene = vp.canvas(title="宇宙场景渲染", width=1200, height=800, center=vp.vector(0, 0, 0))
+    scene.range = 5 * AU / SCALE_FACTOR
+    scene.forward = vp.vec(0, -1, -2)
+    scene.fov = math.pi/6
+    scene.background = vp.color.black
+
+    # 增加说明文本
+    instructions = vp.label(pos=vp.vec(0, 0, 0),
+                           text=INSTRUCTIONS_TEXT,
+                           xoffset=0, yoffset=-scene.height/2 + 30,
+                           color=vp.color.white,
+                           height=15,
+                           box=False)
+    return scene
+
+# 从NumPy数组创建点云
+def make_point_cloud(positions, colors, radii, **attrs):
+    """用一个points对象批量显示大量点，positions/colors为(N,3)数组，radii为(N,)数组"""
+    cloud = vp.points(size_units="world", **attrs)
+    update_point_cloud(cloud, positions, colors, radii)
+    return cloud
+
+def update_point_cloud(cloud, positions, colors, radii, mask=None):
+    """整体替换点云中的全部点（一次clear加一次append），mask为可见点的布尔数组"""
+    if mask is not None:
+        positions, colors, radii = positions[mask], colors[mask], radii[mask]
+    if cloud.npoints > 0:
+        cloud.clear()
+    if len(positions) > 0:
+        # 一次append发送全部点，避免逐个创建或修改场景对象
+        cloud.append([
+            {'pos': vec(*p), 'color': vec(*c), 'radius': r}
+            for p, c, r in zip(positions.tolist(), colors.tolist(), radii.tolist())
+        ])
 
 # 创建星空背景
-def create_starry_background(n_stars=2000, radius=100*AU/SCALE_FACTOR):
-    """创建星空背景"""
+def create_starry_background(data):
+    """创建星空背景（全部星星合并为一个点云对象），data 为场景文件中的 stars 分组"""
+    # 星星位置不会改变，直接使用内存映射的只读数组
+    positions, colors, radii = data['positions'], data['colors'], data['radii']
+
+    return {
+        'cloud': make_point_cloud(positions, colors, radii, emissive=True),
+        'positions': positions,
+        'colors': colors,
+        'radii': radii,
+        'visible': np.ones(len(positions), dtype=bool)
+    }
+
+def create_starry_background_spheres(data):
+    """创建星空背景（每颗星星一个sphere，用于与点云版本对比）"""
     stars = []
-    for i in range(n_stars):
-        theta = random.uniform(0, math.pi)
-        phi = random.uniform(0, 2 * math.pi)
-        r = radius
-        x = r * math.sin(theta) * math.cos(phi)
-        y = r * math.sin(theta) * math.sin(phi)
-        z = r * math.cos(theta)
-        
-        brightness = random.uniform(0.3, 1.0)
-        color = vp.vec(brightness, brightness, brightness*random.uniform(0.8, 1.0))
-        
-        star = vp.sphere(pos=vp.vec(x, y, z), 
-                        radius=random.uniform(0.01, 0.05)*AU/SCALE_FACTOR, 
-                        color=color,
+    for (x, y, z), (r, g, b), radius in zip(data['positions'].tolist(), data['colors'].tolist(),
+                                            data['radii'].tolist()):
+        star = vp.sphere(pos=vp.vec(x, y, z),
+                        radius=radius,
+                        color=vp.vec(r, g, b),
                         emissive=True)
         stars.append(star)
     return stars
 
 # 创建星云
-def create_nebula(pos, size, color):
-    """创建星云"""
+def create_nebula(particles):
+    """创建星云（每个粒子一个半透明球体），particles 为场景文件中该星云的粒子分组"""
     nebula_points = []
-    num_points = 1000
-    
-    for i in range(num_points):
-        # 生成星云中的随机点
-        theta = random.uniform(0, math.pi)
-        phi = random.uniform(0, 2 * math.pi)
-        r = random.uniform(0, size)
-        
-        x = pos.x + r * math.sin(theta) * math.cos(phi)
-        y = pos.y + r * math.sin(theta) * math.sin(phi)
-        z = pos.z + r * math.cos(theta)
-        
-        opacity = random.uniform(0.1, 0.9)
-        point_color = vp.vec(color.x * opacity, color.y * opacity, color.z * opacity)
-        
-        point = vp.sphere(pos=vp.vec(x, y, z),
-                         radius=size/30 * random.uniform(0.1, 0.3),
-                         color=point_color,
+
+    for pos, color, opacity, radius in zip(particles['positions'].tolist(), particles['colors'].tolist(),
+                                           particles['opacity'].tolist(), particles['radii'].tolist()):
+        point = vp.sphere(pos=vp.vec(*pos),
+                         radius=radius,
+                         color=vp.vec(*color),
                          opacity=opacity,
                          emissive=True)
         nebula_points.append(point)
-    
+
     return nebula_points
 
+def create_nebula_impostor(pos, size, color, seed):
+    """用预烘焙的纹理切片创建星云，切片沿三个坐标轴交叉叠放"""
+    layers = load_or_bake_nebula((pos.x, pos.y, pos.z), size, (color.x, color.y, color.z), seed, NEBULA_CACHE_DIR)
+
+    slices = []
+    thickness = size * 0.001
+    for layer in layers:
+        # 切片法线方向为薄边，其余两个方向覆盖整团星云
+        extent = [2 * size, 2 * size, 2 * size]
+        extent[layer['normal']] = thickness
+        slices.append(vp.box(pos=vec(*layer['center']),
+                             size=vec(*extent),
+                             texture=layer['texture'],
+                             opacity=0.8,
+                             emissive=True))
+    return slices
+
+def build_nebula(pos, size, color, seed, particles):
+    """按 NEBULA_MODE 创建星云"""
+    if NEBULA_MODE == "impostor":
+        return create_nebula_impostor(pos, size, color, seed)
+    return create_nebula(particles)
+
 # 创建小行星带
-def create_asteroid_belt(center, inner_radius, outer_radius, num_asteroids=200):
-    """创建小行星带"""
-    asteroids = []
-    
-    for i in range(num_asteroids):
-        angle = random.uniform(0, 2 * math.pi)
-        distance = random.uniform(inner_radius, outer_radius)
-        
-        x = center.x + distance * math.cos(angle)
-        y = center.y + random.uniform(-0.1, 0.1) * inner_radius
-        z = center.z + distance * math.sin(angle)
-        
-        size = random.uniform(0.01, 0.05) * AU / SCALE_FACTOR
-        color_val = random.uniform(0.6, 0.9)
-        
-        asteroid = vp.sphere(pos=vp.vec(x, y, z),
-                           radius=size,
-                           color=vp.vec(color_val, color_val*0.9, color_val*0.7))
-        
-        asteroids.append({
-            'obj': asteroid,
-            'angle': angle,
-            'distance': distance,
-            'speed': math.sqrt(G * 1.989e30 / (distance * SCALE_FACTOR)) * 0.7,  # 轨道速度简化计算
-            'y_offset': y - center.y
-        })
-    
-    return asteroids
+def create_asteroid_belt(state, data):
+    """创建小行星带（整个带用一个点云显示），位置数组与渲染状态共享，data 为场景文件中的 asteroids 分组"""
+    positions = state.asteroid_positions
+    radii, colors = data['radii'], data['colors']
+
+    return {
+        'positions': positions,
+        'colors': colors,
+        'radii': radii,
+        'visible': np.ones(len(positions), dtype=bool),
+        'cloud': make_point_cloud(positions, colors, radii)
+    }
 
 # 创建黑洞
-def create_black_hole(pos, mass, radius):
-    """创建黑洞"""
+def create_black_hole(state):
+    """创建黑洞（核心、吸积盘圆环和附近的粒子）"""
+    pos = vec(*state.black_hole_pos)
+    radius = state.black_hole_radius
+
     # 黑洞核心
     black_hole = vp.sphere(pos=pos,
                          radius=radius,
                          color=vp.color.black,
                          emissive=False,
                          shininess=0)
-    
+
     # 黑洞吸积盘
     accretion_disk = []
-    disk_radius = radius * 5
     disk_thickness = radius * 0.5
-    num_rings = 20
-    
-    for i in range(num_rings):
-        r = radius * 2 + (disk_radius - radius * 2) * i / num_rings
+    num_rings = len(state.ring_radius)
+
+    for i, r in enumerate(state.ring_radius.tolist()):
         ring = vp.ring(pos=pos,
                      axis=vp.vec(0, 1, 0),
                      radius=r,
@@ -137,38 +184,19 @@ def create_black_hole(pos, mass, radius):
                      color=vp.vec(1, 0.5 - i/num_rings/2, 0.1),
                      opacity=0.7 - i/num_rings*0.5,
                      emissive=True)
-        accretion_disk.append({'ring': ring, 'speed': math.sqrt(G * mass / (r * SCALE_FACTOR)) * 0.01, 'angle': 0})
-    
-    # 黑洞附近的粒子
-    particles = []
-    num_particles = 50
-    for i in range(num_particles):
-        dist = random.uniform(radius * 5, radius * 15)
-        angle = random.uniform(0, 2 * math.pi)
-        height = random.uniform(-disk_thickness, disk_thickness)
-        
-        x = pos.x + dist * math.cos(angle)
-        y = pos.y + height
-        z = pos.z + dist * math.sin(angle)
-        
-        particle = vp.sphere(pos=vp.vec(x, y, z),
-                           radius=radius * 0.05,
-                           color=vp.vec(1, 0.3, 0.1),
-                           emissive=True)
-        
-        particles.append({
-            'particle': particle,
-            'distance': dist,
-            'angle': angle,
-            'height': height,
-            'speed': math.sqrt(G * mass / (dist * SCALE_FACTOR)) * 0.05
-        })
-    
+        accretion_disk.append(ring)
+
+    # 黑洞附近的粒子：全部粒子合并为一个点云，每帧整体写入位置
+    n = len(state.bh_positions)
+    colors = np.tile([1.0, 0.3, 0.1], (n, 1))
+    radii = np.full(n, radius * 0.05)
+
     return {
         'core': black_hole,
         'accretion_disk': accretion_disk,
-        'particles': particles,
-        'mass': mass
+        'colors': colors,
+        'radii': radii,
+        'cloud': make_point_cloud(state.bh_positions, colors, radii, emissive=True)
     }
 
 # 创建脉冲星
@@ -179,108 +207,91 @@ def create_pulsar(pos, radius):
                           radius=radius,
                           color=vp.color.white,
                           emissive=True)
-    
+
     # 脉冲星光束
-    beam1 = vp.cone(pos=pos, 
+    beam1 = vp.cone(pos=pos,
                   axis=vp.vec(0, radius*10, 0),
                   radius=radius*2,
                   color=vp.color.cyan,
                   opacity=0.6,
                   emissive=True)
-    
+
     beam2 = vp.cone(pos=pos,
                   axis=vp.vec(0, -radius*10, 0),
                   radius=radius*2,
                   color=vp.color.cyan,
                   opacity=0.6,
                   emissive=True)
-    
+
     return {
         'core': pulsar_core,
         'beam1': beam1,
         'beam2': beam2,
-        'angle': 0,
-        'rotation_speed': 0.1,  # 旋转速度
-        'pulse_timer': 0,
-        'pulse_period': 30  # 脉冲周期（帧数）
+        'brightness': None  # 已经应用的脉冲亮度
     }
 
 # 创建恒星
-def create_star(pos, radius, color=vp.color.yellow):
+def create_star(state, color=vp.color.yellow):
     """创建恒星"""
+    pos = vec(*state.star_pos)
+    radius = state.star_radius
+
     # 恒星核心
     star = vp.sphere(pos=pos,
                    radius=radius,
                    color=color,
                    emissive=True)
-    
+
     # 恒星日冕
-    corona_radius = radius * 1.5
     corona = vp.local_light(pos=pos,
                           color=color,
                           visible=True)
-    
-    # 恒星日冕粒子
-    corona_particles = []
-    num_particles = 100
-    
-    for i in range(num_particles):
-        theta = random.uniform(0, math.pi)
-        phi = random.uniform(0, 2 * math.pi)
-        r = random.uniform(radius * 1.05, corona_radius)
-        
-        x = pos.x + r * math.sin(theta) * math.cos(phi)
-        y = pos.y + r * math.sin(theta) * math.sin(phi)
-        z = pos.z + r * math.cos(theta)
-        
-        particle = vp.sphere(pos=vp.vec(x, y, z),
-                           radius=radius * 0.05,
-                           color=color,
-                           opacity=random.uniform(0.3, 0.7),
-                           emissive=True)
-        
-        corona_particles.append({
-            'particle': particle,
-            'distance': r - radius,
-            'theta': theta,
-            'phi': phi,
-            'speed_theta': random.uniform(-0.01, 0.01),
-            'speed_phi': random.uniform(-0.01, 0.01),
-            'lifetime': random.uniform(50, 200),
-            'age': 0
-        })
-    
+
+    # 恒星日冕粒子（固定容量的对象池，粒子重生时复用同一个sphere）
+    corona_particles = [
+        vp.sphere(pos=vp.vec(x, y, z),
+                  radius=radius * 0.05,
+                  color=color,
+                  opacity=opacity,
+                  emissive=True)
+        for (x, y, z), opacity in zip(state.corona_positions.tolist(), state.corona['opacity'].tolist())
+    ]
+
     return {
         'core': star,
         'corona': corona,
         'particles': corona_particles,
-        'radius': radius
+        'generation': state.corona['generation'].copy()  # 已经同步到sphere的粒子代数
+    }
+
+def corona_pool_stats(star, state):
+    """返回日冕粒子池的占用情况，用于确认长时间运行时对象数量保持不变"""
+    capacity = len(star['particles'])
+    active = sum(1 for p in star['particles'] if p.visible)
+    return {
+        'capacity': capacity,
+        'active': active,
+        'occupancy': active / capacity if capacity else 0.0,
+        'allocated': capacity,  # 粒子只在创建恒星时分配
+        'recycled': state.corona_recycled
     }
 
 # 创建行星
-def create_planet(pos, radius, texture_type, orbit_radius, orbit_speed, parent_pos=vp.vec(0,0,0)):
-    """创建行星"""
-    if texture_type == "rocky":
-        # 岩石行星
-        color = vp.vec(random.uniform(0.5, 0.8), random.uniform(0.5, 0.7), random.uniform(0.3, 0.6))
-    else:
-        # 气态行星
-        color = vp.vec(random.uniform(0.6, 0.9), random.uniform(0.6, 0.9), random.uniform(0.7, 1.0))
-    
+def create_planet(pos, radius, texture_type, orbit_radius, color, num_stripes=0, parent_pos=vp.vec(0,0,0)):
+    """创建行星，颜色和条纹数来自场景文件"""
     planet = vp.sphere(pos=pos,
                      radius=radius,
                      color=color,
                      shininess=0.3)
-    
+
     # 为气态行星添加条纹
     if texture_type == "gas":
         stripes = []
-        num_stripes = random.randint(3, 7)
-        
+
         for i in range(num_stripes):
             y_pos = pos.y - radius + 2 * radius * i / (num_stripes - 1)
             stripe_color = vp.vec(color.x * 0.8, color.y * 0.8, color.z * 0.8)
-            
+
             stripe = vp.ring(pos=vp.vec(pos.x, y_pos, pos.z),
                            axis=vp.vec(0, 1, 0),
                            radius=radius * math.cos(math.asin((y_pos - pos.y) / radius)) if abs(y_pos - pos.y) < radius else 0,
@@ -289,7 +300,7 @@ def create_planet(pos, radius, texture_type, orbit_radius, orbit_speed, parent_p
             stripes.append(stripe)
     else:
         stripes = []
-    
+
     # 添加行星轨道
     orbit = vp.ring(pos=parent_pos,
                   axis=vp.vec(0, 1, 0),
@@ -297,262 +308,215 @@ def create_planet(pos, radius, texture_type, orbit_radius, orbit_speed, parent_p
                   thickness=radius / 20,
                   color=vp.color.white,
                   opacity=0.2)
-    
+
     return {
         'planet': planet,
         'stripes': stripes,
         'orbit': orbit,
-        'orbit_radius': orbit_radius,
-        'orbit_angle': random.uniform(0, 2 * math.pi),
-        'orbit_speed': orbit_speed,
-        'parent_pos': parent_pos,
         'type': texture_type,
         'radius': radius
     }
 
 # 创建行星系统
-def create_solar_system():
+def create_solar_system(state, scene_data):
     """创建一个包含恒星和行星的行星系统"""
     # 中央恒星
-    star_radius = 0.5 * AU / SCALE_FACTOR
-    sun = create_star(vp.vec(0, 0, 0), star_radius, vp.color.yellow)
-    
+    sun = create_star(state, vp.color.yellow)
+
     # 行星系统
-    planets = []
-    
-    # 类地行星（岩石行星）
-    for i in range(4):
-        orbit_radius = (0.4 + i * 0.3) * AU / SCALE_FACTOR
-        planet_radius = (0.03 + i * 0.01) * AU / SCALE_FACTOR
-        
-        # 轨道速度通过开普勒定律计算
-        orbit_speed = math.sqrt(G * 1.989e30 / (orbit_radius * SCALE_FACTOR * 1.5))
-        
-        planet = create_planet(
-            pos=vp.vec(orbit_radius, 0, 0),  # 初始位置
-            radius=planet_radius,
-            texture_type="rocky",
+    planet_data = scene_group(scene_data, 'planets')
+    planets = [
+        create_planet(
+            pos=vp.vec(x, y, z),
+            radius=radius,
+            texture_type="gas" if is_gas else "rocky",
             orbit_radius=orbit_radius,
-            orbit_speed=orbit_speed
+            color=vp.vec(*color),
+            num_stripes=num_stripes
         )
-        planets.append(planet)
-    
+        for (x, y, z), radius, is_gas, orbit_radius, color, num_stripes in zip(
+            state.planet_positions.tolist(), state.planet_radius.tolist(), state.planet_is_gas.tolist(),
+            state.planet_orbit_radius.tolist(), planet_data['color'].tolist(), planet_data['num_stripes'].tolist())
+    ]
+
     # 小行星带
-    asteroids = create_asteroid_belt(
-        center=vp.vec(0, 0, 0),
-        inner_radius=2.2 * AU / SCALE_FACTOR,
-        outer_radius=3.2 * AU / SCALE_FACTOR
-    )
-    
-    # 气态巨行星
-    for i in range(4):
-        orbit_radius = (5.0 + i * 4) * AU / SCALE_FACTOR
-        planet_radius = (0.11 + i * 0.03) * AU / SCALE_FACTOR
-        
-        # 轨道速度通过开普勒定律计算
-        orbit_speed = math.sqrt(G * 1.989e30 / (orbit_radius * SCALE_FACTOR * 2.0))
-        
-        planet = create_planet(
-            pos=vp.vec(orbit_radius, 0, 0),  # 初始位置
-            radius=planet_radius,
-            texture_type="gas",
-            orbit_radius=orbit_radius,
-            orbit_speed=orbit_speed
-        )
-        planets.append(planet)
-    
+    asteroids = create_asteroid_belt(state, scene_group(scene_data, 'asteroids'))
+
     return sun, planets, asteroids
 
 # 创建深空天体
-def create_deep_space_objects():
+def create_deep_space_objects(state, scene_data):
     """创建深空天体（星云、黑洞、脉冲星）"""
     objects = []
-    
-    # 创建星云
-    nebula1 = create_nebula(
-        pos=vp.vec(30 * AU / SCALE_FACTOR, 5 * AU / SCALE_FACTOR, -10 * AU / SCALE_FACTOR),
-        size=5 * AU / SCALE_FACTOR,
-        color=vp.vec(0.2, 0.5, 1.0)  # 蓝色星云
-    )
-    objects.append({"type": "nebula", "objects": nebula1})
-    
-    nebula2 = create_nebula(
-        pos=vp.vec(-25 * AU / SCALE_FACTOR, -8 * AU / SCALE_FACTOR, 15 * AU / SCALE_FACTOR),
-        size=8 * AU / SCALE_FACTOR,
-        color=vp.vec(1.0, 0.2, 0.5)  # 红色星云
-    )
-    objects.append({"type": "nebula", "objects": nebula2})
-    
+
+    # 创建星云，每团星云的种子来自场景文件
+    nebula_seeds = scene_data['nebula.seed'].tolist()
+    for k, nebula in enumerate(NEBULAE):
+        parts = build_nebula(
+            pos=vp.vec(*nebula['pos']),
+            size=nebula['size'],
+            color=vp.vec(*nebula['color']),
+            seed=nebula_seeds[k],
+            particles=scene_group(scene_data, f'nebula{k}')
+        )
+        objects.append({"type": "nebula", "objects": parts})
+
     # 创建黑洞
-    black_hole = create_black_hole(
-        pos=vp.vec(-15 * AU / SCALE_FACTOR, 0, -20 * AU / SCALE_FACTOR),
-        mass=8e30,  # 质量（与太阳质量相当）
-        radius=0.8 * AU / SCALE_FACTOR
-    )
-    objects.append({"type": "black_hole", "object": black_hole})
-    
+    objects.append({"type": "black_hole", "object": create_black_hole(state)})
+
     # 创建脉冲星
     pulsar = create_pulsar(
-        pos=vp.vec(20 * AU / SCALE_FACTOR, 3 * AU / SCALE_FACTOR, 25 * AU / SCALE_FACTOR),
-        radius=0.2 * AU / SCALE_FACTOR
+        pos=vp.vec(*PULSAR_POS),
+        radius=PULSAR_RADIUS
     )
     objects.append({"type": "pulsar", "object": pulsar})
-    
+
     return objects
 
-# 更新恒星
-def update_star(star):
-    """更新恒星效果"""
-    # 更新日冕粒子
-    new_particles = []
-    
-    for p in star['particles']:
-        p['age'] += 1
-        
-        # 移动粒子
-        p['theta'] += p['speed_theta']
-        p['phi'] += p['speed_phi']
-        
-        # 计算新位置
-        r = star['radius'] + p['distance']
-        x = star['core'].pos.x + r * math.sin(p['theta']) * math.cos(p['phi'])
-        y = star['core'].pos.y + r * math.sin(p['theta']) * math.sin(p['phi'])
-        z = star['core'].pos.z + r * math.cos(p['theta'])
-        
-        p['particle'].pos = vp.vec(x, y, z)
-        
-        # 如果粒子寿命未结束，保留它
-        if p['age'] < p['lifetime']:
-            new_particles.append(p)
-        else:
-            p['particle'].visible = False
-            del p['particle']
-    
-    # 补充新粒子
-    while len(new_particles) < 100:
-        theta = random.uniform(0, math.pi)
-        phi = random.uniform(0, 2 * math.pi)
-        r = random.uniform(star['radius'] * 1.05, star['radius'] * 1.5)
-        
-        x = star['core'].pos.x + r * math.sin(theta) * math.cos(phi)
-        y = star['core'].pos.y + r * math.sin(theta) * math.sin(phi)
-        z = star['core'].pos.z + r * math.cos(theta)
-        
-        particle = vp.sphere(pos=vp.vec(x, y, z),
-                           radius=star['radius'] * 0.05,
-                           color=star['core'].color,
-                           opacity=random.uniform(0.3, 0.7),
-                           emissive=True)
-        
-        new_particles.append({
-            'particle': particle,
-            'distance': r - star['radius'],
-            'theta': theta,
-            'phi': phi,
-            'speed_theta': random.uniform(-0.01, 0.01),
-            'speed_phi': random.uniform(-0.01, 0.01),
-            'lifetime': random.uniform(50, 200),
-            'age': 0
-        })
-    
-    star['particles'] = new_particles
-
-# 更新行星位置
-def update_planets(planets):
-    """更新行星轨道位置"""
-    for planet in planets:
-        # 更新轨道角度
-        planet['orbit_angle'] += planet['orbit_speed']
-        
-        # 计算新位置（椭圆轨道）
-        x = planet['parent_pos'].x + planet['orbit_radius'] * math.cos(planet['orbit_angle'])
-        z = planet['parent_pos'].z + planet['orbit_radius'] * math.sin(planet['orbit_angle'])
-        
-        # 更新行星位置
-        planet['planet'].pos = vp.vec(x, planet['parent_pos'].y, z)
-        
-        # 更新条纹位置（如果是气态行星）
-        if planet['type'] == "gas":
-            for stripe in planet['stripes']:
-                stripe_y_offset = stripe.pos.y - planet['planet'].pos.y
-                stripe.pos = vp.vec(x, planet['planet'].pos.y + stripe_y_offset, z)
-
-# 更新小行星带
-def update_asteroids(asteroids):
-    """更新小行星位置"""
-    for asteroid in asteroids:
-        # 更新角度
-        asteroid['angle'] += asteroid['speed']
-        
-        # 计算新位置
-        x = asteroid['distance'] * math.cos(asteroid['angle'])
-        z = asteroid['distance'] * math.sin(asteroid['angle'])
-        
-        # 更新小行星位置
-        asteroid['obj'].pos = vp.vec(x, asteroid['y_offset'], z)
-
-# 更新黑洞
-def update_black_hole(black_hole):
-    """更新黑洞效果"""
-    # 更新吸积盘
-    for ring in black_hole['accretion_disk']:
-        ring['angle'] += ring['speed']
-        ring['ring'].rotate(angle=ring['speed'], axis=vp.vec(0, 1, 0), origin=black_hole['core'].pos)
-    
-    # 更新粒子
-    for particle in black_hole['particles']:
-        # 模拟粒子被吸入黑洞
-        particle['angle'] += particle['speed']
-        particle['distance'] -= particle['speed'] * 10  # 逐渐向黑洞移动
-        
-        # 计算新位置
-        x = black_hole['core'].pos.x + particle['distance'] * math.cos(particle['angle'])
-        y = black_hole['core'].pos.y + particle['height']
-        z = black_hole['core'].pos.z + particle['distance'] * math.sin(particle['angle'])
-        
-        # 更新粒子位置
-        particle['particle'].pos = vp.vec(x, y, z)
-        
-        # 如果粒子太接近黑洞，重置它
-        if particle['distance'] < black_hole['core'].radius * 1.5:
-            particle['distance'] = random.uniform(black_hole['core'].radius * 5, black_hole['core'].radius * 15)
-            particle['angle'] = random.uniform(0, 2 * math.pi)
-            particle['height'] = random.uniform(-black_hole['core'].radius, black_hole['core'].radius) * 0.5
-
-# 更新脉冲星
-def update_pulsar(pulsar):
-    """更新脉冲星效果"""
-    # 更新旋转角度
-    pulsar['angle'] += pulsar['rotation_speed']
-    
-    # 旋转光束
-    new_axis1 = vp.vec(math.sin(pulsar['angle']), math.cos(pulsar['angle']), 0) * pulsar['beam1'].axis.mag
-    new_axis2 = vp.vec(-math.sin(pulsar['angle']), -math.cos(pulsar['angle']), 0) * pulsar['beam2'].axis.mag
-    
-    pulsar['beam1'].axis = new_axis1
-    pulsar['beam2'].axis = new_axis2
-    
-    # 更新脉冲计时器
-    pulsar['pulse_timer'] += 1
-    if pulsar['pulse_timer'] >= pulsar['pulse_period']:
-        pulsar['pulse_timer'] = 0
-        
+# 创建可见性管理
+def create_visibility(state, stars, planets, asteroids, deep_space_objects):
+    """为行星、小行星、星云和背景星空建立可见性分组，状态变化时才修改场景对象"""
+    manager = VisibilityManager()
+    max_distance = MAX_RENDER_DISTANCE / SCALE_FACTOR
+
+    # 行星：LOD 0 完整显示，LOD 1 隐藏条纹；位置数组与渲染状态共享
+    manager.add_group('planets', state.planet_positions,
+                      radii=state.planet_radius,
+                      lod_distances=(STRIPE_LOD_DISTANCE / SCALE_FACTOR,),
+                      max_distance=max_distance,
+                      hysteresis=LOD_HYSTERESIS,
+                      on_change=lambda idx, vis, level: apply_planet_visibility(planets, idx, vis, level))
+
+    # 小行星带：位置数组与渲染状态共享，每帧原地更新
+    def on_asteroids_change(idx, vis, level):
+        asteroids['visible'][idx] = vis
+        update_point_cloud(asteroids['cloud'], asteroids['positions'], asteroids['colors'], asteroids['radii'],
+                           asteroids['visible'])
+    manager.add_group('asteroids', asteroids['positions'],
+                      radii=asteroids['radii'],
+                      max_distance=max_distance,
+                      hysteresis=LOD_HYSTERESIS,
+                      on_change=on_asteroids_change)
+
+    # 星云粒子（或替身切片）
+    nebula_parts = [p for obj in deep_space_objects if obj["type"] == "nebula" for p in obj["objects"]]
+    if nebula_parts:
+        def on_nebula_change(idx, vis, level):
+            for i, v in zip(idx.tolist(), vis.tolist()):
+                nebula_parts[i].visible = v
+        manager.add_group('nebula',
+                          np.array([[p.pos.x, p.pos.y, p.pos.z] for p in nebula_parts]),
+                          radii=[p.radius if isinstance(p, vp.sphere) else p.size.mag / 2 for p in nebula_parts],
+                          max_distance=max_distance,
+                          hysteresis=LOD_HYSTERESIS,
+                          on_change=on_nebula_change)
+
+    # 背景星空位于远处的天球上，只做视锥剔除
+    def on_stars_change(idx, vis, level):
+        stars['visible'][idx] = vis
+        update_point_cloud(stars['cloud'], stars['positions'], stars['colors'], stars['radii'], stars['visible'])
+    manager.add_group('stars', stars['positions'],
+                      radii=stars['radii'],
+                      on_change=on_stars_change)
+
+    return manager
+
+def apply_planet_visibility(planets, idx, visible, level):
+    """只对状态变化的行星修改visible属性"""
+    for i, vis, lod in zip(idx.tolist(), visible.tolist(), level.tolist()):
+        planet = planets[i]
+        planet['planet'].visible = vis
+        for stripe in planet['stripes']:
+            stripe.visible = vis and lod == 0
+
+def camera_from_scene():
+    """读取当前vpython摄像机参数"""
+    cam = scene.camera
+    return Camera(pos=(cam.pos.x, cam.pos.y, cam.pos.z),
+                  forward=(cam.axis.x, cam.axis.y, cam.axis.z),
+                  up=(scene.up.x, scene.up.y, scene.up.z),
+                  fov=scene.fov,
+                  aspect=scene.width / scene.height)
+
+# 更新可见性
+def update_visibility(visibility):
+    """批量更新所有分组的LOD和剔除状态（行星和小行星的位置数组与渲染状态共享）"""
+    return visibility.update(camera_from_scene())
+
+# 同步恒星
+def render_star(star, state):
+    """把日冕粒子位置同步到sphere，重生过的粒子同时更新不透明度"""
+    for sphere, (x, y, z) in zip(star['particles'], state.corona_positions.tolist()):
+        sphere.pos = vp.vec(x, y, z)
+
+    respawned = np.flatnonzero(state.corona['generation'] != star['generation'])
+    for i, opacity in zip(respawned.tolist(), state.corona['opacity'][respawned].tolist()):
+        star['particles'][i].opacity = opacity
+    star['generation'][respawned] = state.corona['generation'][respawned]
+
+# 同步行星位置
+def render_planets(planets, state):
+    """把行星位置同步到场景"""
+    for planet, (x, y, z) in zip(planets, state.planet_positions.tolist()):
+        move_planet(planet, x, y, z)
+
+def move_planet(planet, x, y, z):
+    """移动行星，气态行星的条纹随之移动"""
+    # 更新条纹位置（如果是气态行星）
+    if planet['type'] == "gas":
+        for stripe in planet['stripes']:
+            stripe_y_offset = stripe.pos.y - planet['planet'].pos.y
+            stripe.pos = vp.vec(x, y + stripe_y_offset, z)
+
+    # 更新行星位置
+    planet['planet'].pos = vp.vec(x, y, z)
+
+# 同步小行星带
+def render_asteroids(belt):
+    """批量推送小行星新位置"""
+    update_point_cloud(belt['cloud'], belt['positions'], belt['colors'], belt['radii'], belt['visible'])
+
+# 同步黑洞
+def render_black_hole(black_hole, state):
+    """把粒子位置批量写入点云"""
+    # 吸积盘圆环绕自身对称轴旋转，外观不变，因此不需要逐个调用 rotate
+    update_point_cloud(black_hole['cloud'], state.bh_positions, black_hole['colors'], black_hole['radii'])
+
+# 同步脉冲星
+def render_pulsar(pulsar, state):
+    """旋转光束，脉冲亮度变化时更新颜色"""
+    angle = state.pulsar_angle
+    pulsar['beam1'].axis = vp.vec(math.sin(angle), math.cos(angle), 0) * pulsar['beam1'].axis.mag
+    pulsar['beam2'].axis = vp.vec(-math.sin(angle), -math.cos(angle), 0) * pulsar['beam2'].axis.mag
+
+    brightness = state.pulsar_brightness
+    if brightness is not None and brightness != pulsar['brightness']:
         # 脉冲效果 - 光束亮度变化
-        brightness = 0.5 + 0.5 * math.sin(pulsar['pulse_timer'] / pulsar['pulse_period'] * math.pi)
+        pulsar['brightness'] = brightness
         color = vp.vec(brightness, brightness, 1) * brightness
-        
         pulsar['beam1'].color = color
         pulsar['beam2'].color = color
         pulsar['core'].color = vp.vec(brightness, brightness, brightness)
 
+def render_scene(state, sun, planets, asteroids, deep_space_objects):
+    """把渲染状态（CosmicSimulation 或 InterpolatedState）同步到全部vpython对象"""
+    render_star(sun, state)
+    render_planets(planets, state)
+    render_asteroids(asteroids)
+    for obj in deep_space_objects:
+        if obj["type"] == "black_hole":
+            render_black_hole(obj["object"], state)
+        elif obj["type"] == "pulsar":
+            render_pulsar(obj["object"], state)
+
 # 键盘和鼠标交互
 def handle_keydown(evt):
     """处理键盘按下事件"""
     global RUNNING
-    
+
     # WASD控制摄像机移动
     move_speed = 0.5 * AU / SCALE_FACTOR
-    
+
     if evt.key == 'w':
         scene.camera.pos += scene.camera.axis * move_speed
     elif evt.key == 's':
@@ -568,43 +532,97 @@ def handle_keydown(evt):
     elif evt.key == ' ':
         # 空格键暂停/恢复
         RUNNING = not RUNNING
+    elif evt.key == 'p' and profiler.enabled:
+        # P键导出逐帧耗时记录
+        profiler.write_trace(PROFILE_TRACE_PATH)
+
+# 帧耗时分析
+def instrument_scene_objects(profiler):
+    """
+    统计场景对象的创建和销毁：创建数取自vpython的对象计数，
+    销毁数通过包装场景对象的 delete 方法统计；返回读取当前创建总数的函数
+    """
+    from vpython.vpython import baseObj
+    delete = baseObj.delete
+
+    def counted_delete(obj):
+        profiler.count('destroyed')
+        delete(obj)
+    baseObj.delete = counted_delete
+
+    return lambda: baseObj.objCnt
+
+def update_profile_overlay(profiler):
+    """把滚动百分位统计显示在说明文本下方"""
+    instructions.text = INSTRUCTIONS_TEXT + "\n" + profiler.overlay_text()
 
-# 注册键盘事件处理函数
-scene.bind('keydown', handle_keydown)
-
-# 创建场景
-stars = create_starry_background(3000)
-sun, planets, asteroids = create_solar_system()
-deep_space_objects = create_deep_space_objects()
-
-# 主循环
-while True:
-    vp.rate(30)  # 限制帧率
-    
-    if RUNNING:
-        # 更新恒星
-        update_star(sun)
-        
-        # 更新行星
-        update_planets(planets)
-        
-        # 更新小行星带
-        update_asteroids(asteroids)
-        
-        # 更新深空天体
-        for obj in deep_space_objects:
-            if obj["type"] == "black_hole":
-                update_black_hole(obj["object"])
-            elif obj["type"] == "pulsar":
-                update_pulsar(obj["object"])
-    
-    # 根据摄像机位置优化渲染(LOD)
-    for planet in planets:
-        distance = vp.mag(planet['planet'].pos - scene.camera.pos)
-        # 远距离简化模型
-        if distance > 10 * AU / SCALE_FACTOR:
-            for stripe in planet['stripes']:
-                stripe.visible = False
+def main():
+    global profiler
+    profiler = FrameProfiler(enabled=PROFILE_ENABLED)
+
+    # 创建场景：首次运行按种子生成场景文件，之后直接内存映射该文件
+    scene_data = load_or_generate_scene(SCENE_SEED, SCENE_CACHE_DIR)
+    sim = CosmicSimulation(scene_data, SCENE_SEED, profiler=profiler)
+    if PARALLEL_WORKERS > 0:
+        atexit.register(ParallelStepper(sim, PARALLEL_WORKERS, SCENE_SEED).close)
+    # 渲染读取插值后的状态，模拟步长与渲染帧率解耦
+    state = InterpolatedState(sim)
+    clock = FixedStepClock()
+
+    create_canvas()
+
+    # 注册键盘事件处理函数
+    scene.bind('keydown', handle_keydown)
+
+    if profiler.enabled:
+        object_count = instrument_scene_objects(profiler)
+        atexit.register(profiler.write_trace, PROFILE_TRACE_PATH)
+
+    stars = create_starry_background(scene_group(scene_data, 'stars'))
+    sun, planets, asteroids = create_solar_system(state, scene_data)
+    deep_space_objects = create_deep_space_objects(state, scene_data)
+    visibility = create_visibility(state, stars, planets, asteroids, deep_space_objects)
+
+    # 主循环
+    last_object_count = object_count() if profiler.enabled else 0
+    last_time = time.perf_counter()
+    while True:
+        vp.rate(RENDER_RATE)  # 限制帧率
+        profiler.begin_frame()
+        now = time.perf_counter()
+        elapsed, last_time = now - last_time, now
+
+        if RUNNING:
+            # 按固定步长推进模拟，再把插值后的状态同步到场景
+            dropped, merged = clock.dropped, clock.merged
+            steps = clock.advance(elapsed)
+            start = time.perf_counter()
+            for dt in steps:
+                state.capture()
+                sim.step(dt)
+            clock.record(time.perf_counter() - start, len(steps))
+            profiler.count('ticks', len(steps))
+            profiler.count('dropped_ticks', clock.dropped - dropped)
+            profiler.count('merged_ticks', clock.merged - merged)
+
+            state.update(clock.alpha)
+            with profiler.section('render'):
+                render_scene(state, sun, planets, asteroids, deep_space_objects)
         else:
-            for stripe in planet['stripes']:
-                stripe.visible = True 
\ No newline at end of file
+            # 暂停期间不累计时间
+            clock.reset()
+
+        # 根据摄像机位置优化渲染(LOD和剔除)
+        with profiler.section('lod'):
+            update_visibility(visibility)
+
+        if profiler.enabled:
+            count = object_count()
+            profiler.count('created', count - last_object_count)
+            last_object_count = count
+            profiler.end_frame()
+            if profiler.frame_index % PROFILE_OVERLAY_INTERVAL == 0:
+                update_profile_overlay(profiler)
+
+if __name__ == "__main__":
+    main()
@@ -3,10 +3,34 @@
 
 
 import tkinter as tk
-import random
+import os
 import math
+import sys
 import time
 from itertools import cycle
+import numpy as np
+
+# 共用的字符网格模块在仓库根目录
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from char_grid import CharGrid, Sprite, encode
+
+# 飞船精灵，锚点在中间的 ▲ 上
+SHIP_SPRITE = Sprite.from_lines(['<▲>'], origin=(0, -1))
+PLANET_RADIUS = 8
+PLANET_VARIANTS = 8  # 预先生成的行星纹理数量，每帧轮换一个，保留闪烁效果
+GALAXY_ROTATION_STEPS = 256  # 星系旋转角度的量化步数，每个角度的图形只光栅化一次
+NUM_STARS = 200  # 背景星星数量
+TRAIL_PARTICLES_PER_FRAME = 1  # 每帧尝试生成的尾迹粒子数
+TRAIL_SPAWN_CHANCE = 0.7  # 每个尾迹粒子实际生成的概率
+PARTICLE_CODES = encode('*+.·°')  # 新粒子随机使用的字符
+# 星星亮度阈值及对应字符：> 0.8 '●'，> 0.6 '○'，> 0.3 '·'，其余为空格
+STAR_LEVELS = np.array([0.3, 0.6, 0.8])
+STAR_CODES = encode(' ·○●')
+# 颜色标签：绘制时把标签编号（从1开始）写入字符网格的属性层，0 表示不着色
+COLOR_TAGS = ('star', 'galaxy', 'trail', 'planet', 'ship')
+STAR_TAG, GALAXY_TAG, TRAIL_TAG, PLANET_TAG, SHIP_TAG = range(1, len(COLOR_TAGS) + 1)
+# 固定颜色；星星的颜色每帧从 self.colors 中轮换
+TAG_COLORS = {'galaxy': '#B388FF', 'trail': '#FFB347', 'planet': '#4FC3F7', 'ship': '#FFFFFF'}
 
 
 
@@ -27,17 +51,28 @@ class AsciiArtApp:
         # 初始化艺术参数
         self.width = 120
         self.height = 30
-        self.stars = []
+        self.stars = {}
         self.galaxy_angle = 0
         self.ship_pos = [self.width//2, self.height//2]
         self.ship_direction = 0
         self.ship_speed = 0.5
-        self.particles = []
+        # 尾迹粒子：每个属性一个数组，前 particle_count 个为存活的粒子，容量不够时加倍
+        self.particles = {name: np.zeros(64) for name in ('x', 'y', 'dx', 'dy', 'life', 'max_life')}
+        self.particles['code'] = np.zeros(64, dtype=np.uint32)
+        self.particle_count = 0
         self.colors = cycle(['#FF0000', '#FF7F00', '#FFFF00', '#00FF00', 
                             '#0000FF', '#4B0082', '#8B00FF', '#FFFFFF'])
+        self.grid = CharGrid(self.width, self.height, attributes=True)
+        for tag, color in TAG_COLORS.items():
+            self.canvas.tag_configure(tag, foreground=color)
+        self.frame_count = 0
+        self.planet_pos = (int(self.height * 0.5), int(self.width * 0.7))
+        self.planet_sprites = self.planet_variants(PLANET_RADIUS, PLANET_VARIANTS)
+        self.galaxy_center = (self.height * 0.5, self.width * 0.3)
+        self.galaxy_sprites = {}  # 量化后的旋转角度 -> 星系精灵，用到时才光栅化
         
         # 初始化星星
-        self.initialize_stars(200)
+        self.initialize_stars(NUM_STARS)
         
         # 开始动画循环
         self.animate()
@@ -49,15 +84,70 @@ class AsciiArtApp:
         self.root.bind('<Down>', lambda e: self.change_ship_speed(-0.1))
         
     def initialize_stars(self, count):
+        self.stars = {
+            'x': np.random.randint(0, self.width + 1, count).astype(float),
+            'y': np.random.randint(0, self.height + 1, count).astype(float),
+            'speed': np.random.uniform(0.02, 0.2, count),
+            'brightness': np.random.uniform(0.3, 1.0, count),
+            'phase': np.random.uniform(0, 2*math.pi, count)
+        }
+    
+    def update_stars(self):
+        """星星向左移动，移出画面后从右侧随机高度重新出现；返回本帧的星星字符"""
+        stars = self.stars
+        stars['x'] -= stars['speed']
+        wrapped = np.flatnonzero(stars['x'] < 0)
+        stars['x'][wrapped] = self.width
+        stars['y'][wrapped] = np.random.randint(0, self.height + 1, len(wrapped))
+        
+        # 星星闪烁效果
+        brightness = stars['brightness'] * (0.7 + 0.3 * np.sin(time.time() * 3 + stars['phase']))
+        return STAR_CODES[np.searchsorted(STAR_LEVELS, brightness)]
+    
+    def planet_variants(self, planet_radius, count):
+        """预先光栅化 count 张行星精灵：轮廓固定，外圈和内部的纹理字符各自随机"""
+        dy, dx = np.mgrid[-planet_radius:planet_radius+1, -planet_radius:planet_radius+1]
+        inside = dx*dx + dy*dy <= planet_radius*planet_radius
+        dy, dx = dy[inside], dx[inside]
+        outline = (np.abs(dx) == planet_radius) | (np.abs(dy) == planet_radius)
+        band = dx*dx + dy*dy > (planet_radius-2)*(planet_radius-2)
+        sprites = []
         for _ in range(count):
-            star = {
-                'x': random.randint(0, self.width),
-                'y': random.randint(0, self.height),
-                'speed': random.uniform(0.02, 0.2),
-                'brightness': random.uniform(0.3, 1.0),
-                'phase': random.uniform(0, 2*math.pi)
-            }
-            self.stars.append(star)
+            # 简单的行星纹理
+            codes = np.where(np.random.random(len(dy)) < 0.5, ord('+'), ord('.'))
+            codes[band] = np.where(np.random.random(np.count_nonzero(band)) < 0.5, ord('='), ord('~'))
+            codes[outline] = ord('O')
+            sprites.append(Sprite.from_cells(dy, dx, codes))
+        return sprites
+    
+    def galaxy_sprite(self, galaxy_angle):
+        """旋转角度为 galaxy_angle 时的星系精灵（锚点为星系中心所在的格子），按量化后的角度缓存"""
+        step = round(galaxy_angle / (2 * math.pi) * GALAXY_ROTATION_STEPS) % GALAXY_ROTATION_STEPS
+        sprite = self.galaxy_sprites.get(step)
+        if sprite is None:
+            center_y, center_x = self.galaxy_center
+            i = np.arange(100)
+            angle = step * 2 * math.pi / GALAXY_ROTATION_STEPS + i * 0.2
+            radius = 5 + i * 0.15
+            # 与直接按坐标取整画点的结果一致：先取整绝对坐标，再换成相对中心格子的偏移
+            rows = np.trunc(center_y + radius * np.sin(angle) * 0.4).astype(np.int64) - int(center_y)
+            cols = np.trunc(center_x + radius * np.cos(angle)).astype(np.int64) - int(center_x)
+            sprite = Sprite.from_cells(rows, cols, ord('#'))
+            self.galaxy_sprites[step] = sprite
+        return sprite
+    
+    def apply_color_tags(self, frame):
+        """按属性层着色：同一行相邻的同标签格子合并成一个区段，每个标签只调用一次 tag_add 提交全部区段"""
+        values, rows, starts, stops = frame.attribute_runs()
+        for value, tag in enumerate(COLOR_TAGS, 1):
+            selected = values == value
+            if not selected.any():
+                continue
+            indices = []
+            for line, start, stop in zip((rows[selected] + 1).tolist(), starts[selected].tolist(),
+                                         stops[selected].tolist()):
+                indices += (f"{line}.{start}", f"{line}.{stop}")
+            self.canvas.tag_add(tag, *indices)
     
     def change_ship_direction(self, delta):
         self.ship_direction += delta
@@ -66,24 +156,40 @@ class AsciiArtApp:
         self.ship_speed += delta
         self.ship_speed = max(0, min(2, self.ship_speed))
     
-    def add_particle(self, x, y, dx, dy, life):
-        self.particles.append({
-            'x': x,
-            'y': y,
-            'dx': dx,
-            'dy': dy,
-            'life': life,
-            'max_life': life,
-            'char': random.choice(['*', '+', '.', '·', '°'])
-        })
+    def add_particles(self, x, y, dx, dy, life):
+        """追加一批粒子（参数为等长数组），追加在存活粒子之后"""
+        n = len(life)
+        start, end = self.particle_count, self.particle_count + n
+        capacity = len(self.particles['life'])
+        if end > capacity:
+            capacity = max(end, capacity * 2)
+            for name, values in self.particles.items():
+                grown = np.zeros(capacity, dtype=values.dtype)
+                grown[:start] = values[:start]
+                self.particles[name] = grown
+        p = self.particles
+        p['x'][start:end] = x
+        p['y'][start:end] = y
+        p['dx'][start:end] = dx
+        p['dy'][start:end] = dy
+        p['life'][start:end] = life
+        p['max_life'][start:end] = life
+        p['code'][start:end] = PARTICLE_CODES[np.random.randint(len(PARTICLE_CODES), size=n)]
+        self.particle_count = end
     
     def update_particles(self):
-        for particle in self.particles[:]:
-            particle['x'] += particle['dx']
-            particle['y'] += particle['dy']
-            particle['life'] -= 1
-            if particle['life'] <= 0:
-                self.particles.remove(particle)
+        """移动存活的粒子，寿命耗尽的粒子通过掩码压缩移除（保持其余粒子的先后顺序）"""
+        n = self.particle_count
+        p = self.particles
+        p['x'][:n] += p['dx'][:n]
+        p['y'][:n] += p['dy'][:n]
+        p['life'][:n] -= 1
+        alive = p['life'][:n] > 0
+        count = int(np.count_nonzero(alive))
+        if count < n:
+            for values in p.values():
+                values[:count] = values[:n][alive]
+        self.particle_count = count
     
     def animate(self):
         start_time = time.time()
@@ -91,40 +197,18 @@ class AsciiArtApp:
         # 清空画布
         self.canvas.delete('1.0', tk.END)
         
-        # 创建空白帧
-        frame = [[' ' for _ in range(self.width)] for _ in range(self.height)]
-        
-        # 更新星星
-        for star in self.stars:
-            star['x'] -= star['speed']
-            if star['x'] < 0:
-                star['x'] = self.width
-                star['y'] = random.randint(0, self.height)
-            
-            # 星星闪烁效果
-            brightness = star['brightness'] * (0.7 + 0.3 * math.sin(time.time() * 3 + star['phase']))
-            x, y = int(star['x']), int(star['y'])
-            if 0 <= x < self.width and 0 <= y < self.height:
-                if brightness > 0.8:
-                    frame[y][x] = '●'
-                elif brightness > 0.6:
-                    frame[y][x] = '○'
-                elif brightness > 0.3:
-                    frame[y][x] = '·'
-                else:
-                    frame[y][x] = ' '
+        # 清空字符网格（整块缓冲区复用，不再每帧创建列表的列表）
+        frame = self.grid
+        frame.fill(' ')
+        
+        # 更新星星，全部星星一次写入
+        star_codes = self.update_stars()
+        frame.scatter(self.stars['y'], self.stars['x'], star_codes, STAR_TAG)
         
         # 绘制旋转星系
         self.galaxy_angle += 0.02
-        galaxy_center_x = self.width * 0.3
-        galaxy_center_y = self.height * 0.5
-        for i in range(100):
-            angle = self.galaxy_angle + i * 0.2
-            radius = 5 + i * 0.15
-            x = int(galaxy_center_x + radius * math.cos(angle))
-            y = int(galaxy_center_y + radius * math.sin(angle) * 0.4)
-            if 0 <= x < self.width and 0 <= y < self.height:
-                frame[y][x] = '#'
+        center_y, center_x = self.galaxy_center
+        frame.draw(self.galaxy_sprite(self.galaxy_angle), int(center_y), int(center_x), GALAXY_TAG)
         
         # 更新飞船位置
         self.ship_direction %= 360
@@ -137,72 +221,47 @@ class AsciiArtApp:
         self.ship_pos[1] = max(0, min(self.height-1, self.ship_pos[1]))
         
         # 添加尾迹粒子
-        if random.random() < 0.7 and self.ship_speed > 0:
-            self.add_particle(
-                self.ship_pos[0] - math.cos(rad) * 2,
-                self.ship_pos[1] + math.sin(rad) * 2,
-                -math.cos(rad) * 0.2 + random.uniform(-0.1, 0.1),
-                math.sin(rad) * 0.2 + random.uniform(-0.1, 0.1),
-                random.randint(10, 20)
+        spawn = np.count_nonzero(np.random.random(TRAIL_PARTICLES_PER_FRAME) < TRAIL_SPAWN_CHANCE)
+        if spawn and self.ship_speed > 0:
+            self.add_particles(
+                np.full(spawn, self.ship_pos[0] - math.cos(rad) * 2),
+                np.full(spawn, self.ship_pos[1] + math.sin(rad) * 2),
+                -math.cos(rad) * 0.2 + np.random.uniform(-0.1, 0.1, spawn),
+                math.sin(rad) * 0.2 + np.random.uniform(-0.1, 0.1, spawn),
+                np.random.randint(10, 21, spawn)
             )
         
         # 更新粒子
         self.update_particles()
         
-        # 绘制粒子
-        for particle in self.particles:
-            x, y = int(particle['x']), int(particle['y'])
-            if 0 <= x < self.width and 0 <= y < self.height:
-                alpha = particle['life'] / particle['max_life']
-                if alpha > 0.7:
-                    frame[y][x] = particle['char']
-                elif alpha > 0.4:
-                    frame[y][x] = '·'
-                elif alpha > 0.1:
-                    frame[y][x] = ' '
+        # 绘制粒子：按剩余寿命比例选择字符，寿命不足 10% 的不绘制
+        n = self.particle_count
+        p = self.particles
+        alpha = p['life'][:n] / p['max_life'][:n]
+        codes = np.where(alpha > 0.7, p['code'][:n], np.where(alpha > 0.4, ord('·'), ord(' ')))
+        shown = alpha > 0.1
+        frame.scatter(p['y'][:n][shown], p['x'][:n][shown], codes[shown], TRAIL_TAG)
         
         # 绘制飞船
         ship_x, ship_y = int(self.ship_pos[0]), int(self.ship_pos[1])
-        if 0 <= ship_x < self.width and 0 <= ship_y < self.height:
-            # 简单的飞船图形，方向敏感
-            frame[ship_y][ship_x] = '▲'
-            if 0 <= ship_x-1 < self.width:
-                frame[ship_y][ship_x-1] = '<'
-            if 0 <= ship_x+1 < self.width:
-                frame[ship_y][ship_x+1] = '>'
-        
-        # 绘制行星
-        planet_x = int(self.width * 0.7)
-        planet_y = int(self.height * 0.5)
-        planet_radius = 8
-        for dy in range(-planet_radius, planet_radius+1):
-            for dx in range(-planet_radius, planet_radius+1):
-                if dx*dx + dy*dy <= planet_radius*planet_radius:
-                    x = planet_x + dx
-                    y = planet_y + dy
-                    if 0 <= x < self.width and 0 <= y < self.height:
-                        # 简单的行星纹理
-                        if abs(dx) == planet_radius or abs(dy) == planet_radius:
-                            frame[y][x] = 'O'
-                        elif dx*dx + dy*dy > (planet_radius-2)*(planet_radius-2):
-                            frame[y][x] = random.choice(['=', '~'])
-                        else:
-                            frame[y][x] = random.choice(['+', '.'])
-        
-        # 将帧转换为文本
-        frame_text = '\n'.join([''.join(row) for row in frame])
+        # 简单的飞船图形，超出画面的部分在绘制时裁掉
+        frame.draw(SHIP_SPRITE, ship_y, ship_x, SHIP_TAG)
+        
+        # 绘制行星：轮流使用预先生成的纹理
+        planet = self.planet_sprites[self.frame_count % len(self.planet_sprites)]
+        frame.draw(planet, *self.planet_pos, PLANET_TAG)
+        self.frame_count += 1
+        
+        # 将帧转换为文本（直接由网格缓冲区得到）
+        frame_text = frame.to_string()
         
         # 应用颜色
         next_color = next(self.colors)
-        self.canvas.tag_configure("color", foreground=next_color)
+        self.canvas.tag_configure("star", foreground=next_color)
         self.canvas.insert(tk.END, frame_text)
         
         # 为特定元素着色
-        for y in range(self.height):
-            for x in range(self.width):
-                char = frame[y][x]
-                if char in ['●', '○', '·']:  # 星星
-                    self.canvas.tag_add("color", f"{y+1}.{x}", f"{y+1}.{x+1}")
+        self.apply_color_tags(frame)
         
         # 计算FPS
         elapsed = time.time() - start_time
@@ -9,6 +9,16 @@
 相机围绕场景中心缓慢旋转，以增强 3D 感和动态性。
 """
 
+import argparse
+import ctypes
+import os
+import sys
+
+# 离屏基准测试使用 EGL 软件渲染，必须在导入 PyOpenGL 之前选择平台
+if "--offscreen" in sys.argv:
+    os.environ.setdefault("PYOPENGL_PLATFORM", "egl")
+    os.environ.setdefault("EGL_PLATFORM", "surfaceless") # 不依赖 X11/Wayland 显示
+
 import pygame
 from pygame.locals import *
 from OpenGL.GL import *
@@ -16,6 +26,7 @@ from OpenGL.GLU import *
 import math
 import random
 import time # 使用 time 模块获取时间用于动画
+import numpy as np
 
 # --- 配置参数 ---
 SCREEN_WIDTH = 1280
@@ -25,6 +36,7 @@ PARTICLE_LIFE_MAX = 2.0  # 粒子最大生命周期（秒）
 PARTICLE_SPEED = 0.8    # 粒子基础速度
 ROTATION_SPEED_CUBE = 30 # 中心立方体旋转速度 (度/秒)
 ROTATION_SPEED_CAMERA = 10 # 相机旋转速度 (度/秒)
+PARTICLE_RENDER_MODE = "vbo" # 粒子绘制方式: "immediate" (glBegin/glEnd) 或 "vbo" (顶点缓冲对象)
 
 # --- 粒子类 ---
 class Particle:
@@ -78,51 +90,214 @@ class Particle:
         glColor4f(self.r, self.g, self.b, self.a)
         glVertex3f(self.x, self.y, self.z)
 
+# --- 粒子系统 (结构化数组版本) ---
+class ParticleSystem:
+    """
+    以结构化数组 (Structure of Arrays) 的形式管理全部粒子。
+    位置、速度、生命周期和颜色分别保存在连续的 NumPy 数组中，
+    积分、淡出以及过期粒子的重生都以掩码批量运算完成，
+    行为与逐个更新的 Particle 对象一致。
+    """
+
+    def __init__(self, count, seed=None):
+        self.count = count
+        self.rng = np.random.default_rng(seed)
+
+        self.position = np.zeros((count, 3), dtype=np.float32)
+        self.velocity = np.zeros((count, 3), dtype=np.float32)
+        self.life = np.zeros(count, dtype=np.float32)
+        self.initial_life = np.ones(count, dtype=np.float32)
+        # RGBA，Alpha 通道每帧由剩余生命比例计算
+        self.color = np.zeros((count, 4), dtype=np.float32)
+
+        self.reset(np.arange(count))
+
+    def reset(self, index):
+        """重置指定下标 (整数数组或布尔掩码) 的粒子"""
+        n = len(self.position[index])
+        if n == 0:
+            return
+
+        self.position[index] = 0.0 # 从中心产生
+        # 随机初始速度方向 (球状散开)
+        theta = self.rng.uniform(0, 2 * math.pi, n)
+        phi = np.arccos(self.rng.uniform(-1, 1, n))
+        speed = PARTICLE_SPEED * self.rng.uniform(0.5, 1.5, n)
+        sin_phi = np.sin(phi)
+        self.velocity[index] = np.column_stack((
+            speed * sin_phi * np.cos(theta),
+            speed * sin_phi * np.sin(theta),
+            speed * np.cos(phi),
+        ))
+
+        # 随机生命周期和颜色
+        life = self.rng.uniform(PARTICLE_LIFE_MAX * 0.1, PARTICLE_LIFE_MAX, n)
+        self.life[index] = life
+        self.initial_life[index] = life
+
+        self.color[index] = np.column_stack((
+            self.rng.uniform(0.2, 0.6, n), # 偏冷色调
+            self.rng.uniform(0.1, 0.4, n),
+            self.rng.uniform(0.7, 1.0, n),
+            np.ones(n),                    # 初始 Alpha
+        ))
+
+    def update(self, dt):
+        """批量更新全部粒子"""
+        self.life -= dt
+        expired = self.life <= 0
+        if expired.any():
+            self.reset(expired) # 生命结束则重置
+
+        # 更新位置
+        self.position += self.velocity * dt
+
+        # 更新 Alpha (淡出效果)
+        np.maximum(self.life / self.initial_life, 0.0, out=self.color[:, 3])
+
+    def draw(self):
+        """以立即模式绘制粒子 (需在 glBegin(GL_POINTS) 与 glEnd() 之间调用)"""
+        for color, position in zip(self.color.tolist(), self.position.tolist()):
+            glColor4f(*color)
+            glVertex3f(*position)
+
+# --- 粒子顶点缓冲 ---
+class ParticleVBO:
+    """
+    将粒子的位置和 RGBA 颜色交错写入一个顶点缓冲对象 (VBO)，
+    每帧通过一次 glBufferSubData 上传，再用一次 glDrawArrays 绘制全部粒子。
+    """
+    FLOATS_PER_VERTEX = 7 # x, y, z, r, g, b, a
+    STRIDE = FLOATS_PER_VERTEX * 4 # 每个顶点的字节数 (float32)
+
+    def __init__(self, count):
+        self.count = count
+        # CPU 端的交错数组，每帧复用，避免重复分配
+        self.vertices = np.zeros((count, self.FLOATS_PER_VERTEX), dtype=np.float32)
+        self.buffer = glGenBuffers(1)
+        glBindBuffer(GL_ARRAY_BUFFER, self.buffer)
+        glBufferData(GL_ARRAY_BUFFER, self.vertices.nbytes, None, GL_DYNAMIC_DRAW)
+        glBindBuffer(GL_ARRAY_BUFFER, 0)
+
+    def upload(self, system):
+        """把粒子系统当前的位置和颜色交错拷贝到 VBO"""
+        self.vertices[:, 0:3] = system.position
+        self.vertices[:, 3:7] = system.color
+        glBindBuffer(GL_ARRAY_BUFFER, self.buffer)
+        glBufferSubData(GL_ARRAY_BUFFER, 0, self.vertices.nbytes, self.vertices)
+        glBindBuffer(GL_ARRAY_BUFFER, 0)
+
+    def draw(self):
+        """用一次 glDrawArrays 绘制全部粒子"""
+        glBindBuffer(GL_ARRAY_BUFFER, self.buffer)
+        glEnableClientState(GL_VERTEX_ARRAY)
+        glEnableClientState(GL_COLOR_ARRAY)
+        glVertexPointer(3, GL_FLOAT, self.STRIDE, ctypes.c_void_p(0))
+        glColorPointer(4, GL_FLOAT, self.STRIDE, ctypes.c_void_p(3 * 4))
+        glDrawArrays(GL_POINTS, 0, self.count)
+        glDisableClientState(GL_COLOR_ARRAY)
+        glDisableClientState(GL_VERTEX_ARRAY)
+        glBindBuffer(GL_ARRAY_BUFFER, 0)
+
+    def release(self):
+        """释放 GPU 端的缓冲"""
+        glDeleteBuffers(1, [self.buffer])
+
+# --- 绘制粒子函数 ---
+def draw_particles(particles, vbo=None):
+    """绘制粒子；传入 vbo 时走顶点缓冲路径，否则走立即模式"""
+    if vbo is not None:
+        vbo.upload(particles)
+        vbo.draw()
+    else:
+        glBegin(GL_POINTS)
+        particles.draw()
+        glEnd()
+
+# --- 静态网格 ---
+class StaticMesh:
+    """
+    几何形状不变的实体网格。
+    顶点、面、颜色和面法线只在创建时计算一次，并编译进 OpenGL 显示列表，
+    之后每帧只需一次 glCallList 回放，不再有逐顶点的 Python 调用。
+    """
+
+    def __init__(self, vertices, faces, colors, primitive=GL_QUADS):
+        self.vertices = np.asarray(vertices, dtype=np.float32)
+        self.faces = np.asarray(faces, dtype=np.intp)
+        # 每个面一种颜色，颜色数量不足时循环使用
+        colors = np.asarray(colors, dtype=np.float32)
+        self.colors = colors[np.arange(len(self.faces)) % len(colors)]
+        self.normals = self.compute_face_normals(self.vertices, self.faces)
+        self.primitive = primitive
+        self.display_list = None
+
+    @staticmethod
+    def compute_face_normals(vertices, faces):
+        """取每个面的前三个顶点计算叉积并标准化，得到面法线"""
+        v0 = vertices[faces[:, 0]]
+        normals = np.cross(vertices[faces[:, 1]] - v0, vertices[faces[:, 2]] - v0)
+        norm = np.linalg.norm(normals, axis=1, keepdims=True)
+        return np.divide(normals, norm, out=normals, where=norm > 0)
+
+    def compile(self):
+        """把网格编译进显示列表 (需要有效的 OpenGL 上下文)"""
+        if self.display_list is None:
+            self.display_list = glGenLists(1)
+        glNewList(self.display_list, GL_COMPILE)
+        glBegin(self.primitive)
+        for face, color, normal in zip(self.faces, self.colors, self.normals):
+            glColor3fv(color)
+            glNormal3fv(normal)
+            for vertex_index in face:
+                glVertex3fv(self.vertices[vertex_index])
+        glEnd()
+        glEndList()
+        return self
+
+    def draw(self):
+        """回放显示列表"""
+        glCallList(self.display_list)
+
+    def release(self):
+        """释放显示列表"""
+        if self.display_list is not None:
+            glDeleteLists(self.display_list, 1)
+            self.display_list = None
+
+# 已编译的静态网格，在 init_gl 中创建，按名称查找
+STATIC_MESHES = {}
+
+# --- 立方体几何数据 ---
+CUBE_VERTICES = (
+    ( 1, -1, -1), ( 1,  1, -1), (-1,  1, -1), (-1, -1, -1),
+    ( 1, -1,  1), ( 1,  1,  1), (-1, -1,  1), (-1,  1,  1)
+)
+CUBE_EDGES = (
+    (0, 1), (1, 2), (2, 3), (3, 0), (4, 5), (5, 7), (7, 6),
+    (6, 4), (0, 4), (1, 5), (2, 7), (3, 6)
+)
+CUBE_SURFACES = (
+    (0, 1, 2, 3), (3, 2, 7, 6), (6, 7, 5, 4),
+    (4, 5, 1, 0), (1, 5, 7, 2), (4, 0, 3, 6)
+)
+CUBE_COLORS = (
+    (1, 0, 0), (0, 1, 0), (0, 0, 1), (1, 1, 0),
+    (1, 0, 1), (0, 1, 1), (0.5, 0.5, 0.5), (1, 0.5, 0)
+)
+
 # --- 绘制立方体函数 ---
 def draw_cube():
-    """绘制一个彩色的旋转立方体"""
-    vertices = (
-        ( 1, -1, -1), ( 1,  1, -1), (-1,  1, -1), (-1, -1, -1),
-        ( 1, -1,  1), ( 1,  1,  1), (-1, -1,  1), (-1,  1,  1)
-    )
-    edges = (
-        (0, 1), (1, 2), (2, 3), (3, 0), (4, 5), (5, 7), (7, 6),
-        (6, 4), (0, 4), (1, 5), (2, 7), (3, 6)
-    )
-    surfaces = (
-        (0, 1, 2, 3), (3, 2, 7, 6), (6, 7, 5, 4),
-        (4, 5, 1, 0), (1, 5, 7, 2), (4, 0, 3, 6)
-    )
-    colors = (
-        (1, 0, 0), (0, 1, 0), (0, 0, 1), (1, 1, 0),
-        (1, 0, 1), (0, 1, 1), (0.5, 0.5, 0.5), (1, 0.5, 0)
-    )
-
-    # 使用面绘制 (带基础光照)
-    glBegin(GL_QUADS)
-    for i, surface in enumerate(surfaces):
-        # 为每个面设置一种颜色（或者可以为每个顶点设置颜色以获得平滑过渡）
-        glColor3fv(colors[i % len(colors)])
-        # 计算法线 (简单方式：取前三个顶点计算叉积) - 对光照很重要
-        v1 = [vertices[surface[1]][j] - vertices[surface[0]][j] for j in range(3)]
-        v2 = [vertices[surface[2]][j] - vertices[surface[0]][j] for j in range(3)]
-        normal = [v1[1]*v2[2] - v1[2]*v2[1], v1[2]*v2[0] - v1[0]*v2[2], v1[0]*v2[1] - v1[1]*v2[0]]
-        # 标准化法线向量
-        norm = math.sqrt(sum(n*n for n in normal))
-        if norm > 0:
-            normal = [n / norm for n in normal]
-        glNormal3fv(normal)
-
-        for vertex_index in surface:
-            glVertex3fv(vertices[vertex_index])
-    glEnd()
+    """绘制一个彩色的旋转立方体 (使用 init_gl 中编译好的静态网格)"""
+    # 使用面绘制 (带基础光照)，每个面一种颜色
+    STATIC_MESHES["cube"].draw()
 
     # 绘制边框（可选，增加清晰度）
     # glColor3f(0.8, 0.8, 0.8) # 边框颜色
     # glBegin(GL_LINES)
-    # for edge in edges:
+    # for edge in CUBE_EDGES:
     #     for vertex_index in edge:
-    #         glVertex3fv(vertices[vertex_index])
+    #         glVertex3fv(CUBE_VERTICES[vertex_index])
     # glEnd()
 
 
@@ -163,16 +338,168 @@ def init_gl(width, height):
     # 设置点的大小
     glPointSize(2.5)
 
+    # 预先构建并编译静态网格，绘制时直接回放
+    STATIC_MESHES["cube"] = StaticMesh(CUBE_VERTICES, CUBE_SURFACES, CUBE_COLORS).compile()
+
+# --- 渲染一帧 ---
+def render_scene(particles, vbo, total_time):
+    """提交一帧的全部绘制命令 (不交换缓冲区)"""
+    glClear(GL_COLOR_BUFFER_BIT | GL_DEPTH_BUFFER_BIT) # 清除颜色和深度缓冲区
+    glLoadIdentity() # 重置模型视图矩阵
+
+    # 设置相机旋转
+    camera_angle = total_time * ROTATION_SPEED_CAMERA
+    cam_x = 10 * math.sin(math.radians(camera_angle))
+    cam_z = 10 * math.cos(math.radians(camera_angle))
+    gluLookAt(cam_x, 2, cam_z, 0, 0, 0, 0, 1, 0) # 相机围绕 Y 轴旋转，并稍微抬高
+
+    # 绘制中心旋转立方体
+    glPushMatrix() # 保存当前矩阵状态
+    cube_angle_y = total_time * ROTATION_SPEED_CUBE
+    cube_angle_x = total_time * ROTATION_SPEED_CUBE * 0.7 # 也可以绕多个轴旋转
+    glRotatef(cube_angle_y, 0, 1, 0) # 绕 Y 轴旋转
+    glRotatef(cube_angle_x, 1, 0, 0) # 绕 X 轴旋转
+    glScalef(0.5, 0.5, 0.5) # 缩小立方体
+    glEnable(GL_LIGHTING) # 绘制立方体时光照有效
+    glDisable(GL_BLEND)   # 绘制实心物体时通常禁用混合或使用标准混合
+    draw_cube()
+    glPopMatrix() # 恢复之前的矩阵状态
+
+    # 绘制粒子
+    glEnable(GL_BLEND)           # 为粒子启用混合
+    glBlendFunc(GL_SRC_ALPHA, GL_ONE) # 使用 Additive Blending 产生发光效果
+    glDisable(GL_LIGHTING)       # 粒子通常不受光照影响（除非使用特殊着色器）
+    glDepthMask(GL_FALSE)        # 绘制半透明物体时，禁止写入深度缓冲区，避免遮挡问题
+    draw_particles(particles, vbo)
+    glDepthMask(GL_TRUE)         # 恢复深度缓冲区写入
+
+# --- 离屏上下文 ---
+def create_offscreen_context(width, height):
+    """
+    使用 EGL pbuffer 创建不需要窗口的 OpenGL 上下文 (如 Mesa llvmpipe 软件渲染)。
+    仅在以 --offscreen 启动 (PYOPENGL_PLATFORM=egl) 时可用，返回 (display, surface, context)。
+    """
+    from OpenGL import EGL
+
+    display = EGL.eglGetDisplay(EGL.EGL_DEFAULT_DISPLAY)
+    major, minor = EGL.EGLint(), EGL.EGLint()
+    if not EGL.eglInitialize(display, ctypes.pointer(major), ctypes.pointer(minor)):
+        raise RuntimeError("无法初始化 EGL")
+
+    config_attribs = (EGL.EGLint * 13)(
+        EGL.EGL_SURFACE_TYPE, EGL.EGL_PBUFFER_BIT,
+        EGL.EGL_RED_SIZE, 8, EGL.EGL_GREEN_SIZE, 8, EGL.EGL_BLUE_SIZE, 8,
+        EGL.EGL_DEPTH_SIZE, 24,
+        EGL.EGL_RENDERABLE_TYPE, EGL.EGL_OPENGL_BIT,
+        EGL.EGL_NONE,
+    )
+    config = EGL.EGLConfig()
+    num_configs = EGL.EGLint()
+    EGL.eglChooseConfig(display, config_attribs, ctypes.pointer(config), 1, ctypes.pointer(num_configs))
+    if num_configs.value == 0:
+        raise RuntimeError("没有可用的 EGL pbuffer 配置")
+
+    pbuffer_attribs = (EGL.EGLint * 5)(EGL.EGL_WIDTH, width, EGL.EGL_HEIGHT, height, EGL.EGL_NONE)
+    surface = EGL.eglCreatePbufferSurface(display, config, pbuffer_attribs)
+    # 使用桌面 OpenGL (兼容模式)，才能运行固定管线代码
+    EGL.eglBindAPI(EGL.EGL_OPENGL_API)
+    context = EGL.eglCreateContext(display, config, EGL.EGL_NO_CONTEXT, None)
+    if not EGL.eglMakeCurrent(display, surface, surface, context):
+        raise RuntimeError("无法激活 EGL 上下文")
+    return display, surface, context
+
+def destroy_offscreen_context(handle):
+    """销毁 create_offscreen_context 创建的上下文"""
+    from OpenGL import EGL
+
+    display, surface, context = handle
+    EGL.eglMakeCurrent(display, EGL.EGL_NO_SURFACE, EGL.EGL_NO_SURFACE, EGL.EGL_NO_CONTEXT)
+    EGL.eglDestroyContext(display, context)
+    EGL.eglDestroySurface(display, surface)
+    EGL.eglTerminate(display)
+
+# --- 基准测试 ---
+def run_benchmark(frames=600, seed=0, particle_count=PARTICLE_COUNT,
+                  render_mode=PARTICLE_RENDER_MODE, backend="window"):
+    """
+    以固定时间步长和固定随机种子渲染指定帧数，分阶段统计耗时。
+    backend:
+        "window"    - 真实 pygame 窗口
+        "offscreen" - EGL 离屏上下文 (需以 --offscreen 启动)
+        "none"      - 不使用 OpenGL，只测粒子模拟
+    返回各阶段总耗时 (秒) 和每秒更新的粒子数。
+    """
+    dt = 1.0 / 60.0 # 固定步长，保证每次运行结果一致
+    context = None
+    if backend == "window":
+        pygame.init()
+        pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT), DOUBLEBUF | OPENGL)
+    elif backend == "offscreen":
+        context = create_offscreen_context(SCREEN_WIDTH, SCREEN_HEIGHT)
+
+    use_gl = backend != "none"
+    if use_gl:
+        init_gl(SCREEN_WIDTH, SCREEN_HEIGHT)
+
+    particles = ParticleSystem(particle_count, seed=seed)
+    vbo = ParticleVBO(particle_count) if use_gl and render_mode == "vbo" else None
+
+    timings = {"update": 0.0, "draw": 0.0, "flip": 0.0}
+    total_time = 0.0
+    for _ in range(frames):
+        total_time += dt
+
+        start = time.perf_counter()
+        particles.update(dt)
+        after_update = time.perf_counter()
+        timings["update"] += after_update - start
+
+        if not use_gl:
+            continue
+
+        render_scene(particles, vbo, total_time)
+        after_draw = time.perf_counter()
+        timings["draw"] += after_draw - after_update
+
+        if backend == "window":
+            pygame.event.pump()
+            pygame.display.flip()
+        else:
+            glFinish() # pbuffer 没有可交换的前缓冲，等待 GPU 完成这一帧
+        timings["flip"] += time.perf_counter() - after_draw
+
+    if vbo is not None:
+        vbo.release()
+    if backend == "window":
+        pygame.quit()
+    elif context is not None:
+        destroy_offscreen_context(context)
+
+    total = sum(timings.values())
+    result = dict(timings)
+    result["total"] = total
+    result["particles_per_second"] = particle_count * frames / total if total > 0 else 0.0
+    result["update_particles_per_second"] = (
+        particle_count * frames / timings["update"] if timings["update"] > 0 else 0.0)
+
+    print(f"基准测试: {frames} 帧, {particle_count} 个粒子, 后端 {backend}, 绘制方式 {render_mode}, 种子 {seed}")
+    for phase in ("update", "draw", "flip"):
+        print(f"  {phase:<7} 总计 {timings[phase] * 1000:9.1f} ms  每帧 {timings[phase] * 1000 / frames:7.3f} ms")
+    print(f"  粒子吞吐量 {result['particles_per_second']:,.0f} 粒子/秒 "
+          f"(仅模拟 {result['update_particles_per_second']:,.0f} 粒子/秒)")
+    return result
+
 # --- 主函数 ---
-def main():
+def main(render_mode=PARTICLE_RENDER_MODE):
     pygame.init()
     screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT), DOUBLEBUF | OPENGL)
     pygame.display.set_caption("炫酷 3D 粒子效果 - PyOpenGL Demo")
 
     init_gl(SCREEN_WIDTH, SCREEN_HEIGHT)
 
-    # 创建粒子列表
-    particles = [Particle() for _ in range(PARTICLE_COUNT)]
+    # 创建粒子系统
+    particles = ParticleSystem(PARTICLE_COUNT)
+    vbo = ParticleVBO(PARTICLE_COUNT) if render_mode == "vbo" else None
 
     clock = pygame.time.Clock()
     running = True
@@ -195,49 +522,37 @@ def main():
         total_time += dt
 
         # --- 更新状态 ---
-        for p in particles:
-            p.update(dt)
+        particles.update(dt)
 
         # --- 渲染 ---
-        glClear(GL_COLOR_BUFFER_BIT | GL_DEPTH_BUFFER_BIT) # 清除颜色和深度缓冲区
-        glLoadIdentity() # 重置模型视图矩阵
-
-        # 设置相机旋转
-        camera_angle = total_time * ROTATION_SPEED_CAMERA
-        cam_x = 10 * math.sin(math.radians(camera_angle))
-        cam_z = 10 * math.cos(math.radians(camera_angle))
-        gluLookAt(cam_x, 2, cam_z, 0, 0, 0, 0, 1, 0) # 相机围绕 Y 轴旋转，并稍微抬高
-
-        # 绘制中心旋转立方体
-        glPushMatrix() # 保存当前矩阵状态
-        cube_angle_y = total_time * ROTATION_SPEED_CUBE
-        cube_angle_x = total_time * ROTATION_SPEED_CUBE * 0.7 # 也可以绕多个轴旋转
-        glRotatef(cube_angle_y, 0, 1, 0) # 绕 Y 轴旋转
-        glRotatef(cube_angle_x, 1, 0, 0) # 绕 X 轴旋转
-        glScalef(0.5, 0.5, 0.5) # 缩小立方体
-        glEnable(GL_LIGHTING) # 绘制立方体时光照有效
-        glDisable(GL_BLEND)   # 绘制实心物体时通常禁用混合或使用标准混合
-        draw_cube()
-        glPopMatrix() # 恢复之前的矩阵状态
-
-        # 绘制粒子
-        glEnable(GL_BLEND)           # 为粒子启用混合
-        glBlendFunc(GL_SRC_ALPHA, GL_ONE) # 使用 Additive Blending 产生发光效果
-        glDisable(GL_LIGHTING)       # 粒子通常不受光照影响（除非使用特殊着色器）
-        glDepthMask(GL_FALSE)        # 绘制半透明物体时，禁止写入深度缓冲区，避免遮挡问题
-        glBegin(GL_POINTS)
-        for p in particles:
-            p.draw()
-        glEnd()
-        glDepthMask(GL_TRUE)         # 恢复深度缓冲区写入
+        render_scene(particles, vbo, total_time)
 
         # --- 更新屏幕 ---
         pygame.display.flip() # 交换缓冲区显示画面
         # pygame.time.wait(10) # 可以稍微降低CPU占用率，但会影响帧率平滑度
         clock.tick(60) # 限制帧率不超过 60 FPS
 
+    if vbo is not None:
+        vbo.release()
     pygame.quit()
 
 # --- 程序入口 ---
 if __name__ == '__main__':
-    main()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="炫酷 3D 粒子效果")
+    parser.add_argument("--render", choices=("immediate", "vbo"), default=PARTICLE_RENDER_MODE,
+                        help="粒子绘制方式，用于对比两种路径的性能")
+    parser.add_argument("--benchmark", type=int, metavar="FRAMES",
+                        help="不进入交互循环，渲染指定帧数后输出各阶段耗时")
+    parser.add_argument("--offscreen", action="store_true",
+                        help="基准测试使用 EGL 离屏上下文，无需显示器")
+    parser.add_argument("--no-gl", action="store_true",
+                        help="基准测试跳过 OpenGL，只测粒子模拟")
+    parser.add_argument("--particles", type=int, default=PARTICLE_COUNT, help="基准测试的粒子数量")
+    parser.add_argument("--seed", type=int, default=0, help="基准测试的随机种子")
+    args = parser.parse_args()
+
+    if args.benchmark:
+        backend = "none" if args.no_gl else "offscreen" if args.offscreen else "window"
+        run_benchmark(args.benchmark, args.seed, args.particles, args.render, backend)
+    else:
+        main(args.render)
\ No newline at end of file
@@ -1,34 +1,85 @@
 #我的环境是Windows，请你使用 Python编写一个gui界面，其中运行动态 ASCII 艺术程序，要求是这个ASCII艺术程序是你能想象到的最丑陋，最难看，最无聊的画面
 import tkinter as tk
+import os
 import random
+import sys
 import time
+import numpy as np
+
+# 共用的字符网格模块在仓库根目录
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from char_grid import CharGrid, encode
 
 # --- 常量设置 ---
 WIDTH = 80  # ASCII 画面的宽度（字符数）
 HEIGHT = 25 # ASCII 画面的高度（字符数）
 UPDATE_DELAY = 150 # 更新之间的延迟（毫秒），控制变化速度
 CHARS_TO_CHANGE_PER_FRAME = 15 # 每帧改变多少个字符，控制“动态”程度
+FULL_REDRAW_FRACTION = 0.25 # 一帧内变化的字符超过总数的这个比例时整屏重绘，否则只修改变化的字符
 
 # 定义一个包含丑陋、不和谐或无聊字符的列表
 # 大量使用低对比度的标点符号和空格，偶尔加入一些刺眼的符号
 # 权重偏向无聊字符，使得整体观感更加单调
 UGLY_CHARS = list(".,'`    .,'`    .,'`    #@*?$%^&!~") 
+UGLY_CODES = encode(UGLY_CHARS)
 
 # --- 全局状态 ---
-# 使用列表的列表来存储字符网格
-char_grid = [[' ' for _ in range(WIDTH)] for _ in range(HEIGHT)]
+# 字符网格：一块连续的码位缓冲区（见 char_grid.py），不再为每个格子保存一个字符串对象
+char_grid = CharGrid(WIDTH, HEIGHT)
+# 自上次刷新显示以来内容发生变化的格子 (行, 列)
+dirty_cells = set()
+# 整个网格都需要重新显示（初始化之后）
+full_redraw_pending = True
 
 # --- 功能函数 ---
+def set_char(r, c, char):
+    """修改一个格子，内容真的变了才记为脏格子。"""
+    code = ord(char)
+    if char_grid.cells[r, c] != code:
+        char_grid.cells[r, c] = code
+        dirty_cells.add((r, c))
+
 def initialize_grid():
     """用随机的'丑陋'字符填充初始网格。"""
-    for r in range(HEIGHT):
-        for c in range(WIDTH):
-            char_grid[r][c] = random.choice(UGLY_CHARS)
+    global full_redraw_pending
+    char_grid.cells[:] = UGLY_CODES[np.random.randint(len(UGLY_CODES), size=(HEIGHT, WIDTH))]
+    full_redraw_pending = True
+
+def redraw_all():
+    """整屏重绘：网格缓冲区直接解释成一个字符串写入 Text 部件。"""
+    ascii_text.delete("1.0", tk.END)
+    ascii_text.insert("1.0", char_grid.to_string())
+
+def patch_dirty_cells():
+    """只改写变化的字符：同一行中相邻的脏格子合并成一段，一次 replace 写入。"""
+    cells = sorted(dirty_cells)
+    start = 0
+    for i in range(1, len(cells) + 1):
+        # 当前段在行尾或下一个格子不紧挨着时，写出 cells[start:i]
+        if i == len(cells) or cells[i] != (cells[i - 1][0], cells[i - 1][1] + 1):
+            r, c0 = cells[start]
+            c1 = cells[i - 1][1] + 1
+            # Text 部件的行号从 1 开始，列号从 0 开始
+            ascii_text.replace(f"{r + 1}.{c0}", f"{r + 1}.{c1}", char_grid.text(r, c0, c1))
+            start = i
+
+def refresh_display():
+    """把本帧的变化同步到显示：变化少时逐段修改，超过阈值时整屏重绘。"""
+    global full_redraw_pending
+    if not dirty_cells and not full_redraw_pending:
+        return
+    # Text 部件平时设为只读，修改前临时打开
+    ascii_text.config(state=tk.NORMAL)
+    if full_redraw_pending or len(dirty_cells) > FULL_REDRAW_FRACTION * WIDTH * HEIGHT:
+        redraw_all()
+    else:
+        patch_dirty_cells()
+    ascii_text.config(state=tk.DISABLED)
+    dirty_cells.clear()
+    full_redraw_pending = False
 
 def update_art():
     """随机更新网格中的一些字符，并刷新显示。"""
-    global char_grid
-
     # 随机改变少量字符
     for _ in range(CHARS_TO_CHANGE_PER_FRAME):
         try:
@@ -36,17 +87,14 @@ def update_art():
             r = random.randint(0, HEIGHT - 1)
             c = random.randint(0, WIDTH - 1)
             # 用一个新的随机丑陋字符替换该位置的字符
-            char_grid[r][c] = random.choice(UGLY_CHARS)
+            set_char(r, c, random.choice(UGLY_CHARS))
         except IndexError:
             # 在极少数情况下，如果 HEIGHT 或 WIDTH 为 0，则跳过
             pass
 
-    # 将字符网格转换为用于显示的单字符串（每行用换行符分隔）
-    display_string = "\n".join("".join(row) for row in char_grid)
-
-    # 更新 Label 部件的文本内容
+    # 只把变化的字符写入显示部件，不再每帧拼接整个网格、让 Label 重新排版全部文本
     try:
-        ascii_label.config(text=display_string)
+        refresh_display()
     except tk.TclError:
         # 如果窗口在更新时被关闭，会引发 TclError，这里简单捕获并退出
         print("窗口已关闭，停止更新。")
@@ -63,20 +111,24 @@ root.title("最丑陋无聊的ASCII艺术 (Ugliest Boring ASCII Art)")
 # 设置一个稍微不那么刺眼的背景色，让前景的“丑陋”更突出
 # root.configure(bg='lightgrey') 
 
-# 创建一个 Label 部件来显示 ASCII 艺术
+# 创建一个 Text 部件来显示 ASCII 艺术，每行一个网格行，可以按 "行.列" 单独改写某几个字符
 # 使用等宽字体（如 Courier New）确保字符正确对齐
-# justify=tk.LEFT 确保多行文本左对齐
-# anchor='nw' 使文本在 Label 内从左上角开始显示
-ascii_label = tk.Label(
+# wrap=tk.NONE 禁止自动换行，borderwidth=0 让外观与原来的 Label 一致
+ascii_text = tk.Text(
     root, 
     font=("Courier New", 10),  # 选择等宽字体和适中大小
-    justify=tk.LEFT,           # 左对齐
-    anchor='nw',               # 内容锚定在西北（左上）角
+    width=WIDTH,
+    height=HEIGHT,
+    wrap=tk.NONE,
+    borderwidth=0,
+    highlightthickness=0,
+    cursor="arrow",
+    bg=root.cget("bg"),
     # 可以取消注释下一行来改变文本和背景色，以增加“丑陋感”
     # fg='darkgreen', bg='beige' 
 )
-# 将 Label 添加到窗口中，并留出一些边距
-ascii_label.pack(padx=10, pady=10)
+# 将 Text 添加到窗口中，并留出一些边距
+ascii_text.pack(padx=10, pady=10)
 
 # --- 初始化并运行主循环 ---
 print("正在初始化丑陋无聊的 ASCII 艺术...")
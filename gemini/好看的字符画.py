@@ -2,8 +2,10 @@
 
 import tkinter as tk
 import math
+import sys
 import time
 import random
+import numpy as np
 
 # --- 配置参数 ---
 WIDTH = 100         # ASCII 画布宽度 (字符数)
@@ -55,6 +57,78 @@ def generate_ascii_frame(width, height, t):
         lines.append(line)
     return "\n".join(lines)
 
+# --- NumPy 向量化引擎 ---
+class PlasmaEngine:
+    """
+    generate_ascii_frame 的 NumPy 向量化版本。
+    与时间无关的坐标网格只在分辨率变化时计算一次，
+    每帧只需要对整张网格做一次数组运算，再通过查找表映射到字符。
+    """
+
+    def __init__(self, gradient=CHAR_GRADIENT):
+        # 字符查找表：用 UTF-32 码点保存，方便直接拼出最终字符串
+        self.lut = np.array([ord(ch) for ch in gradient], dtype=np.uint32)
+        self.size = None
+
+    def _prepare(self, width, height):
+        """按分辨率预计算归一化坐标、到中心的距离以及各正弦项的相位"""
+        # 与参考实现保持完全相同的运算顺序，保证结果逐字符一致
+        x = np.arange(width) / width * 2.0 - 1.0
+        y = (np.arange(height) / height * 2.0 - 1.0)[:, np.newaxis]
+        dist_center = np.sqrt(x * x + y * y)
+
+        self.phase1 = dist_center * 10.0
+        self.phase2 = x * 5.0          # 只与列有关，按行广播
+        self.phase3 = y * 6.0          # 只与行有关，按列广播
+        self.phase4 = (x + y) * 7.0
+
+        # 每行末尾多留一列放换行符，渲染后整体解码成一个字符串
+        self.buffer = np.empty((height, width + 1), dtype=np.uint32)
+        self.buffer[:, -1] = ord("\n")
+        self.size = (width, height)
+
+    def render(self, width, height, t):
+        """生成一帧 ASCII 艺术，输出与 generate_ascii_frame 相同"""
+        if self.size != (width, height):
+            self._prepare(width, height)
+
+        v1 = np.sin(self.phase1 - t * 2.0)
+        v2 = np.sin(self.phase2 + t * 1.5)
+        v3 = np.sin(self.phase3 - t * 1.8)
+        v4 = np.sin(self.phase4 + t * 2.2)
+        final_value = (v1 + v2 + v3 + v4) / 4.0
+
+        last = len(self.lut) - 1
+        gradient_index = (((final_value + 1.0) / 2.0) * last).astype(np.intp)
+        np.clip(gradient_index, 0, last, out=gradient_index)
+
+        self.buffer[:, :-1] = self.lut[gradient_index]
+        # 去掉最后一个换行符，与 "\n".join 的结果一致
+        return self.buffer.tobytes().decode("utf-32-le")[:-1]
+
+plasma_engine = PlasmaEngine()
+
+def generate_ascii_frame_numpy(width, height, t):
+    """使用共享的 PlasmaEngine 生成一帧 ASCII 艺术"""
+    return plasma_engine.render(width, height, t)
+
+def check_engines(sizes=((100, 50), (300, 100), (37, 11)), frames=50):
+    """
+    对比纯 Python 参考实现和 NumPy 引擎的输出。
+    返回不一致的帧数，0 表示两者逐字符完全相同。
+    """
+    mismatches = 0
+    for width, height in sizes:
+        for k in range(frames):
+            t = k * UPDATE_DELAY_MS / 1000.0
+            expected = generate_ascii_frame(width, height, t)
+            actual = generate_ascii_frame_numpy(width, height, t)
+            if expected != actual:
+                mismatches += 1
+                print(f"不一致: {width}x{height}, t={t:.3f}")
+    print(f"已比较 {len(sizes) * frames} 帧，不一致 {mismatches} 帧")
+    return mismatches
+
 # --- Tkinter 更新函数 ---
 start_time = time.time()
 def update_frame():
@@ -64,8 +138,8 @@ def update_frame():
     # 计算经过的时间，作为动画驱动
     current_t = time.time() - start_time
 
-    # 生成新的 ASCII 帧
-    ascii_frame = generate_ascii_frame(WIDTH, HEIGHT, current_t)
+    # 生成新的 ASCII 帧 (纯 Python 参考实现见 generate_ascii_frame)
+    ascii_frame = generate_ascii_frame_numpy(WIDTH, HEIGHT, current_t)
 
     # 更新 Label 的文本
     # 使用 try/except 避免在窗口关闭时更新 Label 出错
@@ -78,6 +152,10 @@ def update_frame():
     # 安排下一次更新
     root.after(UPDATE_DELAY_MS, update_frame)
 
+# 使用 --check 参数时只校验两种实现的输出是否一致，不启动界面
+if "--check" in sys.argv:
+    sys.exit(1 if check_engines() else 0)
+
 # --- GUI 设置 ---
 root = tk.Tk()
 root.title("炫酷动态 ASCII 艺术")